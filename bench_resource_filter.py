@@ -0,0 +1,143 @@
+"""
+Бенчмарк блокування ресурсів (services/resource_filter.py).
+
+Відкриває ті самі сторінки товарів двічі — без фільтра і з фільтром — і порівнює:
+- байти, отримані по мережі (сума encodedDataLength з performance-логу Chrome)
+- скільки запитів заблоковано
+- час сторінки (driver.get + парсинг, як у моніторингу)
+- RSS renderer-процесів Chrome після сторінки (Linux, через /proc)
+
+Запуск:
+    python bench_resource_filter.py <url> [<url> ...] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from services.resource_filter import apply_resource_filter, clear_resource_filter
+from services.selenium_parser import _check_one, create_driver
+from utils.urls import detect_brand
+
+
+def _children(pid: int) -> List[int]:
+    result = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            result.append(int(entry))
+    return result
+
+
+def renderer_rss_mb(driver) -> Optional[float]:
+    """
+    Сумарний RSS процесів Chrome з --type=renderer (нащадки chromedriver).
+    None — якщо /proc недоступний (не Linux).
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    root = driver.service.process.pid
+    stack, total_kb = [root], 0
+    while stack:
+        pid = stack.pop()
+        stack.extend(_children(pid))
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"--type=renderer" not in f.read():
+                    continue
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def network_stats(driver) -> Dict[str, int]:
+    """
+    Байти і заблоковані запити з performance-логу (лог очищається при читанні).
+    """
+    received, blocked = 0, 0
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.loadingFinished":
+            received += int(params.get("encodedDataLength") or 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            blocked += 1
+    return {"bytes": received, "blocked": blocked}
+
+
+def run(urls: List[str], rounds: int, filtered: bool) -> Dict[str, List[float]]:
+    driver = create_driver(headless=True, perf_log=True)
+    metrics: Dict[str, List[float]] = {"bytes": [], "blocked": [], "seconds": [], "rss_mb": []}
+    try:
+        for _ in range(rounds):
+            for url in urls:
+                if filtered:
+                    apply_resource_filter(driver, detect_brand(url))
+                else:
+                    clear_resource_filter(driver)
+                # кеш між прогонами не повинен «допомагати» жодному з режимів
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                network_stats(driver)
+
+                started = time.monotonic()
+                status = _check_one(driver, url)
+                metrics["seconds"].append(time.monotonic() - started)
+
+                net = network_stats(driver)
+                metrics["bytes"].append(net["bytes"])
+                metrics["blocked"].append(net["blocked"])
+                rss = renderer_rss_mb(driver)
+                if rss is not None:
+                    metrics["rss_mb"].append(rss)
+                print(
+                    f"{'filtered' if filtered else 'full':8} {url[:60]:60} "
+                    f"{net['bytes'] / 1024:9.0f} KB  {metrics['seconds'][-1]:5.1f}s  "
+                    f"sizes={len(status.sizes)} error={status.error}"
+                )
+    finally:
+        driver.quit()
+    return metrics
+
+
+def _avg(values: List[float]) -> float:
+    return statistics.mean(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    full = run(args.urls, args.rounds, filtered=False)
+    filtered = run(args.urls, args.rounds, filtered=True)
+
+    print()
+    print(f"{'':14}{'full':>12}{'filtered':>12}{'change':>10}")
+    for key, label, scale in (
+        ("bytes", "KB / page", 1 / 1024),
+        ("blocked", "blocked req", 1),
+        ("seconds", "sec / page", 1),
+        ("rss_mb", "renderer MB", 1),
+    ):
+        a, b = _avg(full[key]) * scale, _avg(filtered[key]) * scale
+        change = f"{(b - a) / a * 100:+.0f}%" if a else "—"
+        print(f"{label:14}{a:12.1f}{b:12.1f}{change:>10}")
+
+
+if __name__ == "__main__":
+    main()
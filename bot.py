@@ -1,36 +1,54 @@
 import asyncio
 import logging
+import time
 from html import escape
 
 from aiogram import Bot, Dispatcher
-
-from config import BOT_TOKEN, setup_logging
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from config import (
+    BOT_TOKEN,
+    HTTP_FAST_PATH_ENABLED,
+    HTTP_FAST_PATH_CONCURRENCY,
+    HTTP_FAST_PATH_ORIGINS,
+    SCHEDULE_PERSIST_TOLERANCE,
+    SELENIUM_TABS_PER_BROWSER,
+    TELEGRAM_API_SERVER,
+    setup_logging,
+)
 from handlers import all_routers
 from db import (
     init_db,
-    get_active_subscriptions,
-    update_subscription_status,
+    close_db,
+    run_db,
+    iter_active_subscriptions,
+    get_subscription_statuses,
+    outbox_backlog,
+    WriteBatch,
+    write_batch,
 )
-from services.selenium_parser import check_urls_for_user_parallel
-from utils.urls import extract_available_sizes, detect_brand
-
-MONITOR_INTERVAL = 30  # сек
-STATUS_PREVIEW_LINES = 25  # скільки рядків статусу показувати в дебазі, коли sizes не парсяться
-
-DONE_SENTINEL = "__DONE__"
-
-
-def build_notify_text(
-    url: str,
-    brand: str | None,
-    status_text: str,
-    available_sizes: set[str],
-    wanted_sizes: set[str],
-) -> str:
-    lines = status_text.splitlines()
-    product_name = ""
-    if len(lines) >= 2:
-        product_name = lines[1].strip()
+from services.http_fetcher import HttpAvailabilityFetcher
+from services.monitor_pipeline import MonitorPipeline
+from services.scheduler import next_interval
+from services.selenium_parser import close_driver_pool
+from services.product_status import ProductStatus, status_from_db
+from services.size_catalog import SizeCatalog
+from services.size_index import SizeIndex
+from services.debounce import Debouncer
+from services.outbox import OutboxDelivery
+from services.telegram_sender import SendScheduler
+from utils.urls import detect_brand, product_key
+
+MONITOR_INTERVAL = 30  # сек — базовий інтервал оновлення одного URL (далі адаптується)
+MONITOR_WORKERS = 4  # скільки браузерів безперервно крутять конвеєр (1 драйвер з пулу лишаємо для handle_links)
+MONITOR_TICK = 1  # сек — як часто диспетчер перевіряє дедлайни
+SUBS_REFRESH_INTERVAL = 15  # сек — як часто перечитуємо підписки з БД
+LAG_LOG_INTERVAL = 60  # сек — як часто логувати lag конвеєра
+
+
+def _notify_title(url: str, brand: str | None, status: ProductStatus) -> str:
+    product_name = status.name.strip()
 
     brand_label = (brand or "").strip()
     if not brand_label:
@@ -38,15 +56,17 @@ def build_notify_text(
     brand_label = brand_label.capitalize() if brand_label else "Товар"
 
     if product_name:
-        title = f"{brand_label} — {escape(product_name)}"
-    else:
-        title = brand_label
+        return f"{brand_label} — {escape(product_name)}"
+    return brand_label
 
-    if wanted_sizes:
-        show_sizes = sorted(available_sizes & wanted_sizes)
-    else:
-        show_sizes = sorted(available_sizes)
 
+def build_notify_text(
+    url: str,
+    brand: str | None,
+    status: ProductStatus,
+    show_sizes: list[str],
+) -> str:
+    title = _notify_title(url, brand, status)
     sizes_list = ", ".join(show_sizes) if show_sizes else "—"
 
     return (
@@ -57,185 +77,471 @@ def build_notify_text(
     )
 
 
+def build_digest_entry(
+    url: str,
+    brand: str | None,
+    status: ProductStatus,
+    show_sizes: list[str],
+) -> str:
+    """
+    Короткий запис про один товар для дайджесту (services/notify_digest.py).
+    """
+    title = _notify_title(url, brand, status)
+    sizes_list = ", ".join(show_sizes) if show_sizes else "—"
+
+    return (
+        f"• <a href=\"{url}\">{title}</a>\n"
+        f"  📏 <b>{sizes_list}</b>\n"
+    )
+
+
 async def monitor_loop(bot: Bot):
     logger = logging.getLogger("monitor")
 
-    while True:
+    # вся відправка — через одну чергу з лімітами Telegram (глобальний / на чат / на групу)
+    sender = SendScheduler(bot)
+    sender.start()
+    # сповіщення йдуть через outbox в БД; окремі worker'и зливають їх по чатах
+    # у дайджести (вікно NOTIFY_COALESCE_WINDOW) і шлють через sender
+    delivery = OutboxDelivery(sender)
+    delivery.start()
+
+    loop = asyncio.get_running_loop()
+    results: asyncio.Queue[tuple[str, ProductStatus]] = asyncio.Queue()
+
+    # план фетчу: один унікальний товар → всі підписки на нього {sub_id: (chat_id, brand)}
+    fetch_plan: dict[str, dict[int, tuple[int, str | None]]] = {}
+    # розміри кожного товару інтерновані в каталозі, наявність — бітмаска
+    catalog = SizeCatalog()
+    # товар + розмір → підписки, що його чекають (фільтр sizes)
+    size_index = SizeIndex()
+    # антифлапінг: зміна наявності комітиться тільки після підтвердження (DEBOUNCE_RULES)
+    debouncer = Debouncer()
+    # остання відома наявність підписки (бітмаска); None — товар ще не перевіряли
+    avail_map: dict[int, int | None] = {}
+    # fingerprint останнього збереженого статусу: однаковий → результат пропускаємо цілком
+    hash_map: dict[int, str | None] = {}
+    # товар → fingerprint, який уже збережений у ВСІХ його підписок (і без кандидатів debounce):
+    # такий самий результат пропускаємо, не проходячи по підписках
+    settled: dict[str, str] = {}
+    # лічильники пропусків за поточний інтервал статистики
+    fp_counts = {"skipped": 0, "compared": 0}
+    # адаптивний розклад по товарах: найраніший next_check_at / найменший інтервал серед підписок
+    due_map: dict[str, float | None] = {}
+    interval_map: dict[str, float | None] = {}
+    # інтервал, востаннє записаний у БД, і підписки, в яких розкладу в БД ще немає (NULL)
+    persisted: dict[str, float] = {}
+    unscheduled: dict[str, set[int]] = {}
+    # записи статусів і розкладу копимо тут і пишемо в БД однією транзакцією
+    writes = WriteBatch()
+
+    async def flush_writes():
+        if not len(writes):
+            return
+        batch = writes.take()
         try:
-            rows = get_active_subscriptions()
-            logger.info("ACTIVE SUBS: %s", len(rows))
-
-            users_map: dict[int, list[tuple[int, str, str | None, str | None]]] = {}
-            last_status_map: dict[int, str] = {}
-
-            for r in rows:
-                sub_id = r["id"]
-                chat_id = r["chat_id"]
-                url = r["url"]
-                brand = r["brand"]
-                last_status = r["last_status"] or ""
-                sizes_raw = r.get("sizes") if isinstance(r, dict) else r["sizes"]
-
-                last_status_map[sub_id] = last_status
-                users_map.setdefault(chat_id, []).append((sub_id, url, brand, sizes_raw))
-
-            if not users_map:
-                logger.info("No active subs. Sleep %ss", MONITOR_INTERVAL)
-                await asyncio.sleep(MONITOR_INTERVAL)
+            await run_db(write_batch, batch)
+        except Exception:
+            # статуси вже оновлені в памʼяті — без запису сповіщення загубились би до рестарту
+            writes.restore(batch)
+            raise
+        logger.info(
+            "DB BATCH statuses=%s schedules=%s notifications=%s",
+            len(batch.statuses), len(batch.schedules), len(batch.notifications),
+        )
+        if batch.notifications:
+            delivery.notify()
+
+    def read_plan(known_ids: frozenset[int]):
+        """
+        Виконується в DB-потоці: стрімить активні підписки без великих колонок
+        і одразу складає з них план (без проміжного списку рядків),
+        а збережені статуси дочитує тільки для тих, кого ще немає в памʼяті.
+        """
+        plan: dict[str, dict[int, tuple[int, str | None]]] = {}
+        filters: dict[int, tuple[str, str | None]] = {}  # sub_id → (товар, сирий фільтр sizes)
+        hashes: dict[int, str | None] = {}
+        due: dict[str, float | None] = {}
+        intervals: dict[str, float] = {}
+        pending: dict[str, set[int]] = {}
+        missing: list[int] = []
+        for r in iter_active_subscriptions():
+            sub_id, key = r["id"], product_key(r["url"])
+            plan.setdefault(key, {})[sub_id] = (r["chat_id"], r["brand"])
+            filters[sub_id] = (key, r["sizes"])
+            hashes[sub_id] = r["status_hash"]
+            if sub_id not in known_ids:
+                missing.append(sub_id)
+
+            # нова підписка (next_check_at ще NULL) → товар треба перевірити одразу
+            next_at = r["next_check_at"]
+            if next_at is None:
+                pending.setdefault(key, set()).add(sub_id)
+            if key not in due or next_at is None or (due[key] is not None and next_at < due[key]):
+                due[key] = next_at
+            interval = r["check_interval"]
+            if interval is not None and (intervals.get(key) is None or interval < intervals[key]):
+                intervals[key] = interval
+
+        stored = get_subscription_statuses(missing) if missing else {}
+        return plan, filters, hashes, due, intervals, pending, stored
+
+    async def reload_plan():
+        plan, filters, hashes, due, intervals, pending, stored = await run_db(read_plan, frozenset(avail_map))
+        logger.info("ACTIVE SUBS: %s (statuses read=%s)", len(filters), len(stored))
+
+        # моніторинг — єдиний, хто пише статуси й інтервали, тож те, що вже є в памʼяті,
+        # не старіше за БД (а читання могло стартувати до нашого ж запису)
+        known_avail = dict(avail_map)
+        known_hashes = dict(hash_map)
+        known_intervals = dict(interval_map)
+        known_due = dict(due_map)
+        known_persisted = dict(persisted)
+
+        fetch_plan.clear()
+        fetch_plan.update(plan)
+        avail_map.clear()
+        hash_map.clear()
+        due_map.clear()
+        interval_map.clear()
+        persisted.clear()
+        unscheduled.clear()
+        unscheduled.update(pending)
+
+        wanted: dict[int, tuple[str, int]] = {}
+        for key, subscribers in plan.items():
+            # розклад із памʼяті може ще чекати у writes, тож у БД — минулий next_check_at;
+            # None з БД (нова підписка) все одно означає «перевірити зараз»
+            if key in known_due and due[key] is not None:
+                due_map[key] = known_due[key]
+            else:
+                due_map[key] = due[key]
+
+            interval = known_intervals.get(key) or intervals.get(key)
+            if interval is not None:
+                interval_map[key] = interval
+            stored_interval = known_persisted.get(key) or intervals.get(key)
+            if stored_interval is not None:
+                persisted[key] = stored_interval
+
+            for sub_id, (chat_id, brand) in subscribers.items():
+                if sub_id in known_avail:
+                    avail_map[sub_id] = known_avail[sub_id]
+                    hash_map[sub_id] = known_hashes.get(sub_id)
+                else:
+                    r = stored.get(sub_id)
+                    status = status_from_db(r["status_data"], r["last_status"], brand) if r else None
+                    avail_map[sub_id] = catalog.mask(key, status.available_sizes) if status else None
+                    # старі рядки без status_hash — рахуємо з того, що збережено
+                    hash_map[sub_id] = hashes[sub_id] or (status.fingerprint if status else None)
+                wanted[sub_id] = (key, catalog.parse_filter(key, filters[sub_id][1]))
+
+        # нові підписки (чи зниклі товари) — товар більше не «усталений»
+        for key in [
+            k for k, h in settled.items()
+            if k not in fetch_plan or any(hash_map.get(s) != h for s in fetch_plan[k])
+        ]:
+            del settled[key]
+
+        added, removed = size_index.sync(wanted)
+        debouncer.retain(avail_map)
+        catalog.retain(fetch_plan)
+        logger.info(
+            "FETCH PLAN: unique urls=%s subs=%s index +%s -%s",
+            len(fetch_plan), len(filters), added, removed,
+        )
+
+    async def fan_out(url: str, new_status: ProductStatus):
+        """
+        Один результат скрапінгу → кожна підписка на цей товар
+        зі своєю останньою наявністю і своїм фільтром sizes (все — бітмаски по catalog).
+        """
+        subscribers = fetch_plan.get(url)
+        if not subscribers:
+            logger.warning("WORKER: url not found in fetch_plan: %s", url)
+            return
+
+        if new_status is None:
+            logger.warning("WORKER: empty status url=%s", url)
+            return
+
+        new_hash = new_status.fingerprint
+        settled_hash = settled.get(url)
+        if settled_hash is not None and (settled_hash == new_hash or new_status.fetch_failed):
+            # у всіх підписок уже цей стан (а збій перевірки відомий стан не затирає) —
+            # ні проходу по підписках, ні запису, ні повідомлень
+            fp_counts["compared"] += len(subscribers)
+            fp_counts["skipped"] += len(subscribers)
+            await reschedule(url, new_status, False)
+            return
+
+        new_mask = catalog.mask(url, new_status.available_sizes)
+        new_status_data: str | None = None  # JSON рахуємо тільки якщо треба писати в БД
+
+        if not new_mask:
+            logger.info(
+                "NO SIZES AVAILABLE url=%s error=%s sizes=%s",
+                url, new_status.error, len(new_status.sizes)
+            )
+
+        changed_subs: dict[int, str | None] = {}  # sub_id → попередній fingerprint
+        debouncing = False
+        for sub_id, (chat_id, brand) in subscribers.items():
+            fp_counts["compared"] += 1
+            old_hash = hash_map.get(sub_id)
+            # та сама наявність, що й минулого разу — ні порівнянь, ні запису, ні повідомлень
+            if old_hash == new_hash:
+                fp_counts["skipped"] += 1
+                if debouncer:
+                    debouncer.discard(sub_id)
                 continue
 
-            loop = asyncio.get_running_loop()
+            old_mask = avail_map.get(sub_id)
+
+            # сторінку не отримали — не затираємо останній відомий статус (інакше наступна вдала
+            # дасть хибне «поповнення»); «розпродано» ж — справжній стан, його зберігаємо
+            if new_status.fetch_failed and old_mask is not None:
+                logger.info("SKIP failed check chat=%s sub=%s url=%s error=%s", chat_id, sub_id, url, new_status.error)
+                continue
 
-            for chat_id, items in users_map.items():
-                urls = [u for (_, u, _, _) in items]
-                if not urls:
+            logger.info(
+                "COMPARE chat=%s sub=%s url=%s old=%s new=%s",
+                chat_id, sub_id, url, f"{old_mask or 0:#x}", f"{new_mask:#x}",
+            )
+
+            # зміну вже відомого стану комітимо тільки після K однакових перевірок / dwell сек
+            if old_mask is not None:
+                wanted_mask = size_index.wanted(sub_id)
+                would_send = new_mask != old_mask and bool(new_mask & wanted_mask if wanted_mask else new_mask)
+                if not debouncer.observe(sub_id, brand, new_hash, would_send):
+                    debouncing = True
+                    logger.info("DEBOUNCE pending chat=%s sub=%s url=%s", chat_id, sub_id, url)
                     continue
 
-                logger.info("CHAT %s: urls=%s", chat_id, len(urls))
-
-                url_to_item: dict[str, tuple[int, str | None, str | None]] = {
-                    url: (sub_id, brand, sizes_raw)
-                    for (sub_id, url, brand, sizes_raw) in items
-                }
-
-                queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
-
-                # семафор на відправку (щоб не блокувати і не ловити флуд)
-                send_sem = asyncio.Semaphore(5)
-
-                async def safe_send(text: str, url_for_log: str, sub_id_for_log: int):
-                    async with send_sem:
-                        try:
-                            await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
-                            logger.info("SEND OK chat=%s sub=%s url=%s", chat_id, sub_id_for_log, url_for_log)
-                        except Exception as e:
-                            logger.exception(
-                                "SEND FAIL chat=%s sub=%s url=%s err=%s",
-                                chat_id, sub_id_for_log, url_for_log, e
-                            )
-
-                async def sender_worker():
-                    logger.info("sender_worker START chat=%s", chat_id)
-
-                    while True:
-                        url, new_status = await queue.get()
-
-                        if url == DONE_SENTINEL:
-                            logger.info("sender_worker DONE chat=%s", chat_id)
-                            break
-
-                        logger.info("WORKER GOT chat=%s url=%s status_len=%s", chat_id, url, len(new_status or ""))
-
-                        meta = url_to_item.get(url)
-                        if not meta:
-                            logger.warning("WORKER: url not found in url_to_item: %s", url)
-                            continue
-
-                        sub_id, brand, sizes_raw = meta
-                        old_status = last_status_map.get(sub_id, "")
-
-                        if not new_status:
-                            logger.warning("WORKER: empty status url=%s", url)
-                            continue
-
-                        new_available = extract_available_sizes(new_status)
-                        old_available = extract_available_sizes(old_status)
-
-                        if not new_available:
-                            preview = "\n".join(new_status.splitlines()[:STATUS_PREVIEW_LINES])
-                            logger.info(
-                                "NO SIZES PARSED chat=%s sub=%s url=%s\nSTATUS PREVIEW:\n%s\n---END---",
-                                chat_id, sub_id, url, preview
-                            )
-
-                        logger.info(
-                            "COMPARE chat=%s sub=%s url=%s old=%s new=%s sizes_raw=%s",
-                            chat_id, sub_id, url,
-                            sorted(old_available), sorted(new_available),
-                            sizes_raw
-                        )
-
-                        # оновлюємо last_status якщо змінився текст статусу
-                        if new_status != old_status:
-                            update_subscription_status(sub_id, new_status)
-                            last_status_map[sub_id] = new_status
-                            logger.info("DB UPDATED (status changed) chat=%s sub=%s url=%s", chat_id, sub_id, url)
-
-                        # тригер повідомлення: тільки якщо змінилися розміри
-                        if new_available == old_available:
-                            logger.info("SKIP no size change chat=%s sub=%s url=%s", chat_id, sub_id, url)
-                            continue
-
-                        # якщо після зміни розмірів зараз пусто — не шлемо
-                        if not new_available:
-                            logger.info("SKIP sizes empty after change chat=%s sub=%s url=%s", chat_id, sub_id, url)
-                            continue
-
-                        # фільтр по sizes (якщо користувач вказав)
-                        if sizes_raw:
-                            wanted_sizes = {s.strip().upper() for s in sizes_raw.split(",") if s.strip()}
-                        else:
-                            wanted_sizes = set()  # означає "всі"
-
-                        if wanted_sizes:
-                            trigger = bool(new_available & wanted_sizes)
-                        else:
-                            trigger = True
-
-                        logger.info(
-                            "TRIGGER chat=%s sub=%s url=%s wanted=%s trigger=%s",
-                            chat_id, sub_id, url, sorted(wanted_sizes), trigger
-                        )
-
-                        if not trigger:
-                            continue
-
-                        text = build_notify_text(
-                            url=url,
-                            brand=brand,
-                            status_text=new_status,
-                            available_sizes=new_available,
-                            wanted_sizes=wanted_sizes,
-                        )
-
-                        logger.info("ABOUT TO SEND chat=%s sub=%s url=%s", chat_id, sub_id, url)
-                        asyncio.create_task(safe_send(text, url, sub_id))
-
-                sender_task = asyncio.create_task(sender_worker())
-
-                def on_result(url: str, status: str):
-                    logger.info("CB on_result CALLED chat=%s url=%s status_len=%s", chat_id, url, len(status or ""))
-                    loop.call_soon_threadsafe(queue.put_nowait, (url, status))
-
-                max_workers = 5
-                logger.info("RUN selenium chat=%s urls=%s workers=%s", chat_id, len(urls), max_workers)
-
-                # selenium працює в threadpool, on_result кидає результати в async-чергу
-                await loop.run_in_executor(
-                    None,
-                    check_urls_for_user_parallel,
-                    urls,
-                    max_workers,
-                    on_result
-                )
-
-                # ✅ головне: розбудити воркер і завершити його (інакше може зависнути на queue.get())
-                loop.call_soon_threadsafe(queue.put_nowait, (DONE_SENTINEL, ""))
-
-                await sender_task
-
-        except Exception as e:
-            logger.exception("Error in monitor_loop: %s", e)
-
-        logger.info("SLEEP %ss", MONITOR_INTERVAL)
-        await asyncio.sleep(MONITOR_INTERVAL)
+            # fingerprint інший → наявність змінилась, оновлюємо статус в БД
+            if new_status_data is None:
+                new_status_data = new_status.to_json()
+            writes.add_status(sub_id, new_status_data, new_hash)
+            avail_map[sub_id] = new_mask
+            hash_map[sub_id] = new_hash
+            logger.info("DB QUEUED (status changed) chat=%s sub=%s url=%s", chat_id, sub_id, url)
+
+            # тригер повідомлення: тільки якщо змінилися розміри
+            if new_mask != (old_mask or 0):
+                changed_subs[sub_id] = old_hash
+            else:
+                logger.info("SKIP no size change chat=%s sub=%s url=%s", chat_id, sub_id, url)
+
+        # пропущених і відкладених підписок не лишилось — усі мають new_hash
+        if debouncing or new_status.fetch_failed:
+            settled.pop(url, None)
+        else:
+            settled[url] = new_hash
+
+        # якщо після зміни розмірів зараз пусто — не шлемо
+        if changed_subs and not new_mask:
+            logger.info("SKIP sizes empty after change url=%s subs=%s", url, len(changed_subs))
+
+        # отримувачі — з індексу: тільки ті, хто чекає хоча б один з розмірів, що зараз є
+        for sub_id in size_index.match(url, new_mask) & changed_subs.keys():
+            chat_id, brand = subscribers[sub_id]
+            wanted_mask = size_index.wanted(sub_id)
+            show_mask = new_mask & wanted_mask if wanted_mask else new_mask
+
+            logger.info(
+                "TRIGGER chat=%s sub=%s url=%s wanted=%s show=%s",
+                chat_id, sub_id, url, f"{wanted_mask:#x}", f"{show_mask:#x}",
+            )
+
+            # в тому ж WriteBatch, що й новий статус → одна транзакція;
+            # той самий перехід (старий → новий fingerprint) не ставиться в outbox двічі
+            show_sizes = catalog.labels(url, show_mask)
+            writes.add_notification(
+                f"{sub_id}:{changed_subs[sub_id]}>{new_hash}",
+                chat_id,
+                sub_id,
+                build_notify_text(url=url, brand=brand, status=new_status, show_sizes=show_sizes),
+                build_digest_entry(url=url, brand=brand, status=new_status, show_sizes=show_sizes),
+            )
+            logger.info("NOTIFY QUEUED chat=%s sub=%s url=%s", chat_id, sub_id, url)
+
+        # поки зміна не підтверджена — перевіряємо товар так само часто, як при зміні
+        await reschedule(url, new_status, bool(changed_subs) or debouncing)
+
+    async def reschedule(url: str, new_status: ProductStatus, changed: bool):
+        """
+        Адаптивний планувальник: товари з 🟡 або свіжими змінами перевіряємо частіше,
+        стабільні — все рідше (в межах MONITOR_MIN_INTERVAL..MONITOR_MAX_INTERVAL).
+        """
+        low_stock = new_status.low_stock
+        failed = new_status.fetch_failed
+
+        interval = next_interval(
+            prev_interval=interval_map.get(url),
+            base_interval=MONITOR_INTERVAL,
+            changed=changed,
+            low_stock=low_stock,
+            failed=failed,
+        )
+        next_at = time.time() + interval
+        interval_map[url] = interval
+        due_map[url] = next_at
+
+        pipeline.reschedule(url, next_at)
+
+        # у памʼяті розклад уже точний, а в БД він потрібен лише після рестарту:
+        # усім підпискам пишемо тільки помітну зміну інтервалу, інакше — лише новим (NULL)
+        prev = persisted.get(url)
+        if prev is None or abs(interval - prev) > prev * SCHEDULE_PERSIST_TOLERANCE:
+            persisted[url] = interval
+            targets = fetch_plan.get(url, {})
+            unscheduled.pop(url, None)
+        else:
+            targets = unscheduled.pop(url, ())
+        for sub_id in targets:
+            writes.add_schedule(sub_id, next_at, interval)
+        if writes.full():
+            await flush_writes()
+        logger.info(
+            "SCHEDULE url=%s next_in=%.0fs changed=%s low_stock=%s failed=%s",
+            url, interval, changed, low_stock, failed,
+        )
+
+    def on_result(url: str, status: ProductStatus):
+        logger.info("CB on_result CALLED url=%s error=%s", url, status.error)
+        loop.call_soon_threadsafe(results.put_nowait, (url, status))
+
+    async def result_consumer():
+        while True:
+            url, new_status = await results.get()
+            logger.info("WORKER GOT url=%s sizes=%s", url, len(new_status.sizes))
+            try:
+                await fan_out(url, new_status)
+            except Exception as e:
+                logger.exception("Error while processing result url=%s: %s", url, e)
+
+    # selenium працює в окремих потоках, on_result кидає результати в async-чергу
+    pipeline = MonitorPipeline(
+        # у режимі вкладок кожен браузер дає SELENIUM_TABS_PER_BROWSER worker'ів
+        workers=MONITOR_WORKERS * SELENIUM_TABS_PER_BROWSER,
+        refresh_interval=MONITOR_INTERVAL,
+        on_result=on_result,
+    )
+    fetcher = HttpAvailabilityFetcher(origins=HTTP_FAST_PATH_ORIGINS)
+    fast_tasks: set[asyncio.Task] = set()
+
+    async def fast_check(url: str, slots: asyncio.Semaphore):
+        try:
+            status = await fetcher.fetch(url)
+        finally:
+            slots.release()
+
+        if status is None:
+            # fallback: швидкий шлях не спрацював → у браузер
+            pipeline.submit(url)
+        else:
+            logger.info("FAST PATH OK url=%s", url)
+            pipeline.complete(url, status)
+
+    async def fast_path_feeder():
+        """
+        Безперервно бере «прострочені» URL і пробує їх через aiohttp.
+        Браузер отримує тільки ті, де HTTP не дав результату.
+        """
+        slots = asyncio.Semaphore(HTTP_FAST_PATH_CONCURRENCY * 2)
+        while True:
+            await slots.acquire()
+            urls = [] if pipeline.backlog_full() else pipeline.take_due(limit=1)
+            if not urls:
+                slots.release()
+                await asyncio.sleep(MONITOR_TICK)
+                continue
+            task = asyncio.create_task(fast_check(urls[0], slots))
+            fast_tasks.add(task)
+            task.add_done_callback(fast_tasks.discard)
+
+    pipeline.start()
+    consumer_task = asyncio.create_task(result_consumer())
+    feeder_task = asyncio.create_task(fast_path_feeder()) if HTTP_FAST_PATH_ENABLED else None
+
+    next_refresh = 0.0
+    next_stats = 0.0
+    try:
+        while True:
+            try:
+                now = loop.time()
+                if now >= next_refresh:
+                    await reload_plan()
+                    pipeline.sync_urls(due_map)
+                    next_refresh = now + SUBS_REFRESH_INTERVAL
+
+                if writes.due():
+                    await flush_writes()
+
+                if feeder_task is None:
+                    queued = pipeline.dispatch()
+                    if queued:
+                        logger.info("DISPATCH queued=%s", queued)
+
+                if now >= next_stats:
+                    stats = pipeline.stats()
+                    logger.info(
+                        "PIPELINE tracked=%s queued=%s heap=%s checked=%s lag_avg=%.1fs lag_max=%.1fs",
+                        stats["tracked"], stats["queued"], stats["heap"], stats["checked"],
+                        stats["lag_avg"], stats["lag_max"],
+                    )
+                    logger.info("FAST PATH hits=%s misses=%s", fetcher.hits, fetcher.misses)
+                    out_stats = delivery.stats()
+                    # ще не відправлене з outbox у БД (рахується по частковому індексу idx_outbox_pending)
+                    backlog = await run_db(outbox_backlog)
+                    logger.info(
+                        "OUTBOX delivered=%s messages=%s retried=%s dropped=%s queued=%s backlog=%s",
+                        out_stats["delivered"], out_stats["messages"], out_stats["retried"],
+                        out_stats["dropped"], out_stats["queued"], backlog,
+                    )
+                    send_stats = sender.stats()
+                    logger.info(
+                        "SEND pending=%s chats=%s sent=%s failed=%s retries=%s retry_after=%s",
+                        send_stats["pending"], send_stats["chats"], send_stats["sent"],
+                        send_stats["failed"], send_stats["retries"], send_stats["retry_after"],
+                    )
+                    logger.info(
+                        "DEBOUNCE pending=%s suppressed_writes=%s suppressed_sends=%s",
+                        len(debouncer), debouncer.suppressed_writes, debouncer.suppressed_sends,
+                    )
+                    compared = fp_counts["compared"]
+                    logger.info(
+                        "FINGERPRINT skipped=%s compared=%s skip_rate=%.0f%%",
+                        fp_counts["skipped"], compared,
+                        100.0 * fp_counts["skipped"] / compared if compared else 0.0,
+                    )
+                    fp_counts["skipped"] = fp_counts["compared"] = 0
+                    next_stats = now + LAG_LOG_INTERVAL
+
+            except Exception as e:
+                logger.exception("Error in monitor_loop: %s", e)
+
+            await asyncio.sleep(MONITOR_TICK)
+    finally:
+        if feeder_task is not None:
+            feeder_task.cancel()
+        consumer_task.cancel()
+        await fetcher.close()
+        await loop.run_in_executor(None, pipeline.stop)
+        await flush_writes()
+        await delivery.stop()
+        await sender.close()
 
 
 async def main():
     setup_logging()
-    init_db()
+    await run_db(init_db)
 
-    bot = Bot(token=BOT_TOKEN)
+    # TELEGRAM_API_SERVER — свій / фейковий Bot API (напр. для навантажувальних тестів відправки)
+    session = None
+    if TELEGRAM_API_SERVER:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_SERVER))
+    bot = Bot(token=BOT_TOKEN, session=session)
 
     # швидка перевірка що бот живий
     me = await bot.get_me()
@@ -246,7 +552,12 @@ async def main():
         dp.include_router(r)
 
     asyncio.create_task(monitor_loop(bot))
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        # браузери з пулу живуть весь час роботи бота — закриваємо при виході
+        close_driver_pool()
+        await run_db(close_db)
 
 
 if __name__ == "__main__":
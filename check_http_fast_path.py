@@ -0,0 +1,96 @@
+"""
+Перевірка швидкого шляху (services/http_fetcher.py) проти локального stub-сервера.
+
+Stub віддає записані відповіді з fixtures/http_fast_path/ (JSON товару Zara, HTML Bershka з ld+json),
+fetcher ходить на нього через origins — без мережі і без браузера.
+
+Запуск:
+    python check_http_fast_path.py
+Код виходу 0 — всі кейси збіглись з очікуваними.
+"""
+import asyncio
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+from services.http_fetcher import HttpAvailabilityFetcher
+from services.product_status import SIZE_IN, SIZE_LOW, SIZE_OUT
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "http_fast_path")
+
+# шлях товару → (файл для ?ajax=true, файл для HTML-сторінки); None — 404
+ROUTES: Dict[str, Tuple[Optional[str], Optional[str]]] = {
+    "/ua/uk/sorochka-z-lonom-p04786312.html": ("zara_product.json", None),
+    "/ua/uk/zhaket-oversaiz-p04786399.html": ("zara_sold_out.json", None),
+    "/ua/uk/znyknuv-p00000001.html": (None, None),
+    "/ua/dzhinsy-wide-leg-c0p123456789.html": (None, "bershka_product.html"),
+    "/ua/bez-danykh-c0p987654321.html": (None, "bershka_no_ld.html"),
+}
+
+# url → очікуваний результат: (назва, розміри) або None (швидкий шлях не впорався → Selenium)
+CASES = [
+    (
+        "https://www.zara.com/ua/uk/sorochka-z-lonom-p04786312.html?v1=412345678",
+        ("СОРОЧКА З ЛЬОНОМ", (("XS", SIZE_OUT), ("S", SIZE_LOW), ("M", SIZE_IN), ("L", SIZE_IN), ("XL", SIZE_OUT))),
+    ),
+    (
+        "https://www.zara.com/ua/uk/sorochka-z-lonom-p04786312.html?v1=412345679",
+        ("СОРОЧКА З ЛЬОНОМ", (("XS", SIZE_IN), ("S", SIZE_OUT))),
+    ),
+    (
+        "https://www.zara.com/ua/uk/zhaket-oversaiz-p04786399.html",
+        ("ЖАКЕТ ОВЕРСАЙЗ", (("S", SIZE_OUT), ("M", SIZE_OUT))),
+    ),
+    ("https://www.zara.com/ua/uk/znyknuv-p00000001.html", None),
+    (
+        "https://www.bershka.com/ua/dzhinsy-wide-leg-c0p123456789.html",
+        ("Джинси wide leg", (("32", SIZE_IN), ("34", SIZE_LOW), ("36", SIZE_OUT))),
+    ),
+    ("https://www.bershka.com/ua/bez-danykh-c0p987654321.html", None),
+]
+
+
+async def stub_handler(request: web.Request) -> web.Response:
+    json_file, html_file = ROUTES.get(request.path, (None, None))
+    name = json_file if request.query.get("ajax") == "true" else html_file
+    if name is None:
+        return web.Response(status=404, text="not found")
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        body = f.read()
+    content_type = "application/json" if name.endswith(".json") else "text/html"
+    return web.Response(text=body, content_type=content_type)
+
+
+async def run() -> int:
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", stub_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    origin = f"http://127.0.0.1:{port}"
+
+    fetcher = HttpAvailabilityFetcher(origins={"zara": origin, "bershka": origin})
+    failures = 0
+    try:
+        for url, expected in CASES:
+            status = await fetcher.fetch(url)
+            got = None if status is None else (status.name, status.sizes)
+            ok = got == expected
+            failures += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {url}")
+            if not ok:
+                print(f"     expected: {expected}\n     got:      {got}")
+    finally:
+        await fetcher.close()
+        await runner.cleanup()
+
+    print(f"\n{len(CASES) - failures}/{len(CASES)} passed (hits={fetcher.hits} misses={fetcher.misses})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -4,11 +4,107 @@ from dotenv import load_dotenv
 
 load_dotenv()
 BOT_TOKEN = os.getenv("TOKEN")
+# Свій Bot API сервер (локальний telegram-bot-api або фейковий для тестів), напр. http://127.0.0.1:8081
+TELEGRAM_API_SERVER = os.getenv("TELEGRAM_API_SERVER")
 
 # Обмеження
 MAX_PER_BRAND = 50
 REQUEST_TIMEOUT = 15
 
+# Пул Chrome-драйверів (спільний для моніторингу і handle_links)
+DRIVER_POOL_SIZE = 5
+DRIVER_MAX_PAGES = 100  # після стількох сторінок driver перезапускається
+SELENIUM_URL_DEADLINE = 90  # сек на одну сторінку після того, як worker її взяв
+# pageLoadStrategy браузерів пулу: normal — чекати повне завантаження, eager — тільки DOM,
+# none — не чекати взагалі (готовність визначають парсери через services/readiness.py)
+PAGE_LOAD_STRATEGY = "eager"
+# >1 — режим вкладок (services/tab_pool.py): DRIVER_POOL_SIZE браузерів по стільки вкладок,
+# кожна вкладка — окремий worker. У цьому режимі браузери завжди з pageLoadStrategy none,
+# інакше chromedriver тримав би спільну сесію, поки вантажиться одна вкладка
+SELENIUM_TABS_PER_BROWSER = 1
+# Опційно: постійні профілі Chrome для браузерів пулу (services/chrome_profile.py) —
+# HTTP-кеш (JS-бандли брендів) переживає перезапуск driver'а. Не задано — чистий профіль, як раніше.
+CHROME_PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR")
+# каталог-шаблон, яким ініціалізується новий профіль (напр. з уже прийнятими банерами)
+CHROME_PROFILE_TEMPLATE = os.getenv("CHROME_PROFILE_TEMPLATE")
+# Новий браузер пулу одразу відкриває головні сторінки брендів: TLS, DNS і JS-бандли
+# вже прогріті до першої справжньої перевірки
+DRIVER_PREWARM = True
+PREWARM_ORIGINS = {
+    "zara": "https://www.zara.com/ua/",
+    "bershka": "https://www.bershka.com/ua/",
+}
+
+# Блокування ресурсів, які парсери не читають (картинки, відео, шрифти, аналітика), через CDP
+RESOURCE_BLOCKING_ENABLED = True
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*analytics.tiktok.com*", "*hotjar.com*",
+    "*criteo.com*", "*newrelic.com*", "*nr-data.net*", "*bing.com/bat*",
+]
+# Додатково по бренду: deny — ще заблокувати, allow — не блокувати з загального списку
+BRAND_RESOURCE_RULES = {
+    "zara": {"deny": ["*static.zara.net/photos*", "*static.zara.net/video*"], "allow": []},
+    "bershka": {"deny": ["*static.bershka.net/*/photos*", "*static.bershka.net/*/video*"], "allow": []},
+}
+
+# Кукі, які новий браузер пулу отримує ще до першої сторінки (services/consent.py):
+# згода OneTrust — щоб банер кукі не зʼявлявся зовсім
+CONSENT_COOKIE_DOMAINS = [".zara.com", ".bershka.com"]
+ONETRUST_CONSENT_GROUPS = "C0001:1,C0002:1,C0003:1,C0004:1"
+# вибір магазину (гео-модалка «залишитися на сайті»): [{"domain": ..., "name": ..., "value": ...}]
+# значення беруться з браузера після ручного кліку — залежать від країни
+STORE_COOKIES = []
+
+# Швидкий шлях через aiohttp (без браузера), Selenium — тільки як fallback
+HTTP_FAST_PATH_ENABLED = True
+HTTP_FAST_PATH_CONCURRENCY = 10  # скільки HTTP-запитів одночасно
+# Підміна scheme+host по бренду (локальний stub-сервер із записаними відповідями, див. check_http_fast_path.py),
+# напр. HTTP_FAST_PATH_ORIGINS="zara=http://127.0.0.1:8080,bershka=http://127.0.0.1:8080"
+HTTP_FAST_PATH_ORIGINS = dict(
+    item.strip().split("=", 1)
+    for item in os.getenv("HTTP_FAST_PATH_ORIGINS", "").split(",")
+    if "=" in item
+)
+
+# Адаптивний планувальник перевірок (сек)
+MONITOR_MIN_INTERVAL = 15  # нижня межа: для 🟡 і товарів, де щойно були зміни
+MONITOR_MAX_INTERVAL = 30 * 60  # верхня межа: для товарів без змін (напр. давно розпродані)
+MONITOR_BACKOFF = 1.5  # у скільки разів росте інтервал, якщо нічого не змінилось
+MONITOR_JITTER = 0.1  # ±10% випадкового зсуву, щоб перевірки не збивались в одну хвилю
+# розклад у БД переписуємо, лише коли інтервал змінився більше ніж на цю частку
+# (в памʼяті він точний; БД потрібна тільки після рестарту)
+SCHEDULE_PERSIST_TOLERANCE = 0.25
+
+# Ліміти Telegram на відправку повідомлень ботом
+TG_GLOBAL_RATE = 25  # повідомлень/сек сумарно (офіційно ~30)
+TG_CHAT_RATE = 1  # повідомлень/сек в один чат
+TG_GROUP_RATE_PER_MIN = 20  # повідомлень/хв в одну групу
+TG_SEND_QUEUE_SIZE = 1000  # скільки повідомлень максимум чекає відправки (далі — backpressure)
+TG_SEND_MAX_RETRIES = 3  # повтори на мережевих / 5xx помилках
+
+# Скільки секунд збирати сповіщення одного чату, щоб злити їх в один дайджест
+NOTIFY_COALESCE_WINDOW = 5
+
+# Антифлапінг наявності: зміна комітиться після K однакових перевірок поспіль
+# або якщо тримається не менше dwell сек — (K, dwell) по бренду
+DEBOUNCE_RULES = {
+    "zara": (2, 120),  # у Zara розміри часто «блимають» 🟢/🟡 ↔ 🔴
+    "bershka": (2, 120),
+}
+DEBOUNCE_DEFAULT = (1, 0)  # без антифлапінгу
+
+# Outbox сповіщень (доставка at-least-once)
+OUTBOX_WORKERS = 4  # скільки async-worker'ів розсилають сповіщення
+OUTBOX_POLL_INTERVAL = 1  # сек між перевірками outbox, коли роботи немає
+OUTBOX_CLAIM_LEASE = 120  # сек — після цього незавершене сповіщення забере інший worker
+OUTBOX_MAX_ATTEMPTS = 5  # після стількох невдалих спроб сповіщення відкидається
+OUTBOX_RETRY_DELAY = 30  # сек між спробами (множиться на номер спроби)
+OUTBOX_RETENTION = 24 * 60 * 60  # скільки тримати відправлені рядки
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.6167.85 Safari/537.36",
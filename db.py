@@ -1,25 +1,102 @@
 # db.py
+import asyncio
 import sqlite3
-from typing import List, Dict, Any, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "db.sqlite3"
 
+BUSY_TIMEOUT = 10  # сек — скільки чекати на lock замість "database is locked"
 
-def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+# WAL: читачі (хендлери бота) не блокують писача (моніторинг) і навпаки
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # з WAL безпечно, fsync тільки на checkpoint
+    "PRAGMA cache_size = -16000",  # ~16 МБ page cache на зʼєднання
+    "PRAGMA mmap_size = 67108864",  # 64 МБ memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+# Колонки активних підписок для моніторингу — без великих last_status / status_data
+ACTIVE_COLUMNS = "id, user_id, chat_id, url, brand, sizes, status_hash, next_check_at, check_interval"
+# Покривний індекс для них: без id (rowid і так є в кожному записі індексу), але з is_active —
+# інакше SQLite все одно ходить у таблицю перевіряти WHERE
+ACTIVE_INDEX_COLUMNS = "user_id, chat_id, url, brand, sizes, status_hash, next_check_at, check_interval, is_active"
+STATUS_COLUMNS = "last_status, status_data"
+
+FETCH_BATCH = 500  # скільки рядків тягнути з курсора за раз при стрімінгу
+SQLITE_MAX_PARAMS = 900  # запас до ліміту SQLite на кількість "?" в одному запиті
+
+_local = threading.local()
+
+# Окремий потік для БД: event loop (бот + моніторинг) ніколи не чекає на диск сам
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    Одне зʼєднання на потік: створюється при першому зверненні і далі перевикористовується.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
     return conn
 
 
+@contextmanager
+def connection():
+    """
+    with connection() as conn: ...
+    Зʼєднання потоку; якщо всередині виняток — відкочуємо незакомічене.
+    """
+    conn = _get_conn()
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Async-фасад: виконує синхронну функцію БД у виділеному DB-потоці.
+        subs = await run_db(get_user_subscriptions, user_id)
+    Один потік → одне зʼєднання, записи йдуть по черзі без "database is locked".
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(fn, *args, **kwargs))
+
+
+def close_db():
+    """
+    Закриває зʼєднання поточного потоку (напр. при виході з бота).
+    Зʼєднання DB-потоку закривайте через: await run_db(close_db)
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
 def init_db():
     """
     Ініціалізація БД:
     - створює таблицю subscriptions, якщо її ще немає
-    - додає колонку sizes при оновленні схеми
+    - додає колонки sizes, status_data, status_hash, next_check_at, check_interval при оновленні схеми
+    - створює індекси для вибірок моніторингу і /my_links
+    - створює таблицю outbox для сповіщень
     """
-    conn = _get_conn()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         # Базова схема (включаючи поле sizes)
         cur.execute(
@@ -32,6 +109,10 @@ def init_db():
                 brand TEXT,
                 sizes TEXT,
                 last_status TEXT,
+                status_data TEXT,
+                status_hash TEXT,
+                next_check_at REAL,
+                check_interval REAL,
                 is_active INTEGER NOT NULL DEFAULT 1,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(user_id, url)
@@ -40,99 +121,393 @@ def init_db():
         )
         conn.commit()
 
-        # Міграція на випадок, якщо таблиця вже була створена раніше БЕЗ поля sizes
-        try:
-            cur.execute("ALTER TABLE subscriptions ADD COLUMN sizes TEXT")
-            conn.commit()
-        except sqlite3.OperationalError:
-            # Колонка вже існує — ігноруємо
-            pass
+        # Міграція на випадок, якщо таблиця вже була створена раніше БЕЗ нових полів
+        for column in (
+            "sizes TEXT",
+            "status_data TEXT",  # ProductStatus.to_json(); last_status лишився для старих рядків
+            "status_hash TEXT",  # ProductStatus.fingerprint — для пропуску незмінених результатів
+            "next_check_at REAL",  # unix time наступної перевірки (адаптивний планувальник)
+            "check_interval REAL",  # поточний інтервал перевірки, сек
+        ):
+            try:
+                cur.execute(f"ALTER TABLE subscriptions ADD COLUMN {column}")
+                conn.commit()
+            except sqlite3.OperationalError:
+                # Колонка вже існує — ігноруємо
+                pass
+
+        # WHERE is_active = 1 (моніторинг) і WHERE user_id = ? ORDER BY created_at (/my_links).
+        # is_active = 1 майже в усіх рядках, тож індекс по самому прапорцю нічого не відсіює —
+        # натомість частковий покривний індекс: план моніторингу читається з нього,
+        # без великих last_status / status_data з таблиці
+        cur.execute("DROP INDEX IF EXISTS idx_subscriptions_active")
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_subscriptions_active_plan "
+            f"ON subscriptions({ACTIVE_INDEX_COLUMNS}) WHERE is_active = 1"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_subscriptions_user_created "
+            "ON subscriptions(user_id, created_at)"
+        )
+
+        # Outbox сповіщень: пишеться в тій самій транзакції, що й новий статус (write_batch),
+        # розсилається окремо (services/outbox.py) — at-least-once
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedupe_key TEXT NOT NULL,
+                chat_id INTEGER NOT NULL,
+                sub_id INTEGER,
+                text TEXT NOT NULL,
+                digest_entry TEXT,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                claimed_until REAL,
+                sent_at REAL,
+                failed_at REAL
+            )
+            """
+        )
+        # поки сповіщення не відправлене, друге з тим самим dedupe_key не додається
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_dedupe ON outbox(dedupe_key) "
+            "WHERE sent_at IS NULL AND failed_at IS NULL"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(chat_id, created_at) "
+            "WHERE sent_at IS NULL AND failed_at IS NULL"
+        )
+        conn.commit()
 
-    finally:
-        conn.close()
 
 def add_subscription(
     user_id: int,
     chat_id: int,
     url: str,
     brand: str | None,
-    last_status: str | None,
+    status_data: str | None = None,
     sizes: str | None = None,
+    status_hash: str | None = None,
 ):
     """
     Додає підписку.
     UNIQUE(user_id, url) — один юзер не може додати той самий URL двічі.
+    status_data — ProductStatus.to_json() першої перевірки (або None), status_hash — її fingerprint.
     sizes:
       - None або ""  → слідкуємо за всіма розмірами
       - "M,L,XL"     → слідкуємо тільки за цими розмірами
     """
-    conn = _get_conn()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT OR IGNORE INTO subscriptions (user_id, chat_id, url, brand, sizes, last_status, is_active)
-            VALUES (?, ?, ?, ?, ?, ?, 1)
+            INSERT OR IGNORE INTO subscriptions
+                (user_id, chat_id, url, brand, sizes, status_data, status_hash, is_active)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
             """,
-            (user_id, chat_id, url, brand, sizes, last_status),
+            (user_id, chat_id, url, brand, sizes, status_data, status_hash),
         )
         conn.commit()
-    finally:
-        conn.close()
+
+
+def iter_active_subscriptions(with_status: bool = False) -> Iterator[sqlite3.Row]:
+    """
+    Стрімить активні підписки порціями по FETCH_BATCH, не тримаючи всю таблицю в памʼяті.
+    with_status=False — без last_status / status_data (для плану моніторингу вони не потрібні,
+    статуси нових підписок дочитуються через get_subscription_statuses).
+
+    Генератор тримає курсор зʼєднання поточного потоку, тож споживати його треба в тому ж
+    потоці, напр. всередині функції, яку запускають через run_db.
+    """
+    columns = f"{ACTIVE_COLUMNS}, {STATUS_COLUMNS}" if with_status else ACTIVE_COLUMNS
+    with connection() as conn:
+        cur = conn.execute(f"SELECT {columns} FROM subscriptions WHERE is_active = 1")
+        try:
+            while True:
+                rows = cur.fetchmany(FETCH_BATCH)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
 
 
 def get_active_subscriptions() -> List[sqlite3.Row]:
     """
-    Повертає всі активні підписки.
-    Використовується monitor_loop.
+    Повертає всі активні підписки (разом зі статусами).
+    Для великих таблиць краще iter_active_subscriptions.
     """
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, user_id, chat_id, url, brand, sizes, last_status
-            FROM subscriptions
-            WHERE is_active = 1
+    return list(iter_active_subscriptions(with_status=True))
+
+
+def get_subscription_statuses(sub_ids: Iterable[int]) -> Dict[int, sqlite3.Row]:
+    """
+    Статуси (last_status, status_data) для конкретних підписок: {sub_id: row}.
+    """
+    ids = list(sub_ids)
+    result: Dict[int, sqlite3.Row] = {}
+    with connection() as conn:
+        for i in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            cur = conn.execute(
+                f"SELECT id, {STATUS_COLUMNS} FROM subscriptions WHERE id IN ({placeholders})",
+                chunk,
+            )
+            for row in cur:
+                result[row["id"]] = row
+    return result
+
+
+def add_subscriptions_bulk(items: List[Dict[str, Any]]):
+    """
+    Масове додавання підписок однією транзакцією (напр. всі URL з одного повідомлення).
+    items: [{"user_id", "chat_id", "url", "brand", "status_data", "status_hash", "sizes"}, ...]
+    Як і add_subscription: якщо підписка вже є (UNIQUE(user_id, url)) — рядок не чіпаємо.
+    """
+    if not items:
+        return
+
+    with connection() as conn:
+        conn.executemany(
             """
+            INSERT OR IGNORE INTO subscriptions
+                (user_id, chat_id, url, brand, sizes, status_data, status_hash, is_active)
+            VALUES (:user_id, :chat_id, :url, :brand, :sizes, :status_data, :status_hash, 1)
+            """,
+            [
+                {"sizes": None, "status_data": None, "status_hash": None, **item}
+                for item in items
+            ],
         )
-        rows = cur.fetchall()
-        return rows
-    finally:
-        conn.close()
+        conn.commit()
 
 
-def update_subscription_status(sub_id: int, new_status: str):
+class WriteBatch:
     """
-    Оновлює last_status для конкретної підписки.
-    Використовується monitor_loop після перевірки.
+    Буфер записів моніторингу (unit of work): статуси, розклад перевірок і сповіщення (outbox).
+    Накопичується в event loop, а в БД іде однією транзакцією через write_batch().
+    Скидати треба, коли due(): набралось max_items записів або минуло max_delay сек.
     """
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
+
+    def __init__(self, max_items: int = 200, max_delay: float = 2.0):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.statuses: Dict[int, Tuple[str, str]] = {}  # sub_id → (status_data, status_hash)
+        self.schedules: Dict[int, Tuple[float, float]] = {}
+        # (dedupe_key, chat_id, sub_id, text, digest_entry, created_at)
+        self.notifications: List[Tuple[str, int, int, str, str, float]] = []
+        self._started: float | None = None
+
+    def __len__(self) -> int:
+        return len(self.statuses) + len(self.schedules) + len(self.notifications)
+
+    def add_status(self, sub_id: int, status_data: str, status_hash: str):
+        self._touch()
+        self.statuses[sub_id] = (status_data, status_hash)
+
+    def add_schedule(self, sub_id: int, next_check_at: float, check_interval: float):
+        self._touch()
+        self.schedules[sub_id] = (next_check_at, check_interval)
+
+    def add_notification(self, dedupe_key: str, chat_id: int, sub_id: int, text: str, digest_entry: str):
+        self._touch()
+        self.notifications.append((dedupe_key, chat_id, sub_id, text, digest_entry, time.time()))
+
+    def full(self) -> bool:
+        return len(self) >= self.max_items
+
+    def due(self) -> bool:
+        if not len(self):
+            return False
+        return self.full() or time.monotonic() - self._started >= self.max_delay
+
+    def take(self) -> "WriteBatch":
+        """
+        Забирає накопичене в окремий WriteBatch (його і передаємо в write_batch),
+        а цей буфер очищається під нові записи.
+        """
+        batch = WriteBatch(self.max_items, self.max_delay)
+        batch.statuses, self.statuses = self.statuses, {}
+        batch.schedules, self.schedules = self.schedules, {}
+        batch.notifications, self.notifications = self.notifications, []
+        self._started = None
+        return batch
+
+    def restore(self, batch: "WriteBatch"):
+        """
+        Повертає в буфер батч, який не вдалось записати (новіші записи тих самих підписок лишаються).
+        """
+        self._touch()
+        self.statuses = {**batch.statuses, **self.statuses}
+        self.schedules = {**batch.schedules, **self.schedules}
+        self.notifications = batch.notifications + self.notifications
+
+    def _touch(self):
+        if self._started is None:
+            self._started = time.monotonic()
+
+
+def write_batch(batch: WriteBatch):
+    """
+    Записує WriteBatch однією транзакцією (один fsync замість сотні).
+    """
+    if not len(batch):
+        return
+
+    with connection() as conn:
+        if batch.statuses:
+            conn.executemany(
+                "UPDATE subscriptions SET status_data = ?, status_hash = ? WHERE id = ?",
+                [(data, digest, sub_id) for sub_id, (data, digest) in batch.statuses.items()],
+            )
+        if batch.schedules:
+            conn.executemany(
+                "UPDATE subscriptions SET next_check_at = ?, check_interval = ? WHERE id = ?",
+                [(next_at, interval, sub_id) for sub_id, (next_at, interval) in batch.schedules.items()],
+            )
+        if batch.notifications:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO outbox (dedupe_key, chat_id, sub_id, text, digest_entry, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                batch.notifications,
+            )
+        conn.commit()
+
+
+# ---------- outbox ----------
+
+_OUTBOX_READY = (
+    "sent_at IS NULL AND failed_at IS NULL AND next_attempt_at <= :now "
+    "AND (claimed_until IS NULL OR claimed_until < :now)"
+)
+
+
+def claim_outbox(
+    max_chats: int,
+    window: float,
+    lease: float,
+) -> List[Tuple[int, List[sqlite3.Row]]]:
+    """
+    Забирає в роботу готові сповіщення, згруповані по чатах: [(chat_id, [row, ...]), ...].
+    Чат готовий, коли його найстаріше сповіщення чекає вже window сек (вікно злиття в дайджест).
+    Рядки «орендуються» на lease сек: якщо за цей час не буде ack/retry — їх забере наступний claim.
+    """
+    now = time.time()
+    params = {"now": now, "ready_before": now - window, "limit": max_chats}
+    with connection() as conn:
+        chats = [
+            r["chat_id"]
+            for r in conn.execute(
+                f"""
+                SELECT chat_id FROM outbox
+                WHERE {_OUTBOX_READY}
+                GROUP BY chat_id
+                HAVING MIN(created_at) <= :ready_before
+                LIMIT :limit
+                """,
+                params,
+            )
+        ]
+        if not chats:
+            return []
+
+        groups: List[Tuple[int, List[sqlite3.Row]]] = []
+        claimed: List[int] = []
+        for chat_id in chats:
+            rows = conn.execute(
+                f"""
+                SELECT id, chat_id, sub_id, text, digest_entry, attempts FROM outbox
+                WHERE chat_id = :chat_id AND {_OUTBOX_READY}
+                ORDER BY id
+                """,
+                {**params, "chat_id": chat_id},
+            ).fetchall()
+            if rows:
+                groups.append((chat_id, rows))
+                claimed.extend(r["id"] for r in rows)
+
+        conn.executemany(
+            "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+            [(now + lease, outbox_id) for outbox_id in claimed],
+        )
+        conn.commit()
+        return groups
+
+
+def ack_outbox(ids: List[int]):
+    """
+    Позначає сповіщення відправленими.
+    """
+    with connection() as conn:
+        conn.executemany(
+            "UPDATE outbox SET sent_at = ?, claimed_until = NULL WHERE id = ?",
+            [(time.time(), outbox_id) for outbox_id in ids],
+        )
+        conn.commit()
+
+
+def retry_outbox(ids: List[int], delay: float, max_attempts: int) -> int:
+    """
+    Відкладає невдалі сповіщення на delay сек; після max_attempts спроб — здаємось (failed_at).
+    Повертає, скільки сповіщень відкинули.
+    """
+    now = time.time()
+    with connection() as conn:
+        conn.executemany(
             """
-            UPDATE subscriptions
-            SET last_status = ?
+            UPDATE outbox
+            SET attempts = attempts + 1, next_attempt_at = ?, claimed_until = NULL
             WHERE id = ?
             """,
-            (new_status, sub_id),
+            [(now + delay, outbox_id) for outbox_id in ids],
+        )
+        placeholders = ",".join("?" * len(ids))
+        cur = conn.execute(
+            f"UPDATE outbox SET failed_at = ? WHERE attempts >= ? AND id IN ({placeholders})",
+            [now, max_attempts, *ids],
+        )
+        conn.commit()
+        return cur.rowcount
+
+
+def outbox_backlog() -> int:
+    """
+    Скільки сповіщень ще чекає відправки.
+    """
+    with connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND failed_at IS NULL"
+        ).fetchone()[0]
+
+
+def purge_outbox(older_than: float):
+    """
+    Видаляє відправлені / відкинуті сповіщення, старші за older_than сек.
+    """
+    cutoff = time.time() - older_than
+    with connection() as conn:
+        conn.execute(
+            "DELETE FROM outbox WHERE COALESCE(sent_at, failed_at) < ?",
+            (cutoff,),
         )
         conn.commit()
-    finally:
-        conn.close()
+
 
 def get_user_subscriptions(user_id: int) -> List[sqlite3.Row]:
     """
     Повертає всі підписки конкретного користувача (активні/неактивні),
     для команди типу /my_links.
     """
-    conn = _get_conn()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
-            SELECT id, url, brand, sizes, last_status, is_active, created_at
+            SELECT id, url, brand, sizes, last_status, status_data, is_active, created_at
             FROM subscriptions
             WHERE user_id = ?
             ORDER BY created_at DESC
@@ -140,5 +515,3 @@ def get_user_subscriptions(user_id: int) -> List[sqlite3.Row]:
             (user_id,),
         )
         return cur.fetchall()
-    finally:
-        conn.close()
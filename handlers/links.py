@@ -1,9 +1,13 @@
 from aiogram import Router, F
 from aiogram.types import Message
+from config import HTTP_FAST_PATH_ENABLED
+from services.http_fetcher import HttpAvailabilityFetcher
+from services.product_status import ProductStatus
 from services.selenium_parser import check_many_products_selenium_parallel, format_results
 from utils.urls import extract_urls, detect_brand
-from db import add_subscription
+from db import add_subscriptions_bulk, run_db
 import asyncio
+from functools import partial
 
 router = Router()
 
@@ -26,11 +30,19 @@ async def handle_links(message: Message):
         f"Знайшов <b>{len(urls)}</b> посилань.", parse_mode="HTML"
     )
 
+    # спершу швидкий HTTP-шлях, Selenium — тільки для того, що не вдалось
+    prefetched: dict[str, ProductStatus] = {}
+    if HTTP_FAST_PATH_ENABLED:
+        fetcher = HttpAvailabilityFetcher()
+        try:
+            prefetched = await fetcher.fetch_many(urls)
+        finally:
+            await fetcher.close()
+
     loop = asyncio.get_running_loop()
     results = await loop.run_in_executor(
         None,
-        check_many_products_selenium_parallel,
-        urls,
+        partial(check_many_products_selenium_parallel, urls, prefetched=prefetched),
     )
 
     blocks = format_results(results)
@@ -41,16 +53,20 @@ async def handle_links(message: Message):
     user_id = message.from_user.id
     chat_id = message.chat.id
 
-    for brand_key in ["zara", "bershka", "other"]:
-        for url, status in results.get(brand_key, []):
-            brand = detect_brand(url)
-            add_subscription(
-                user_id=user_id,
-                chat_id=chat_id,
-                url=url,
-                brand=brand,
-                last_status=status,
-            )
+    # всі URL повідомлення — однією транзакцією
+    items = [
+        {
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "url": url,
+            "brand": detect_brand(url),
+            "status_data": status.to_json(),
+            "status_hash": status.fingerprint,
+        }
+        for brand_key in ["zara", "bershka", "other"]
+        for url, status in results.get(brand_key, [])
+    ]
+    await run_db(add_subscriptions_bulk, items)
 
     await message.answer(
         "🔔 Я додав ці посилання в моніторинг.\n"
@@ -2,8 +2,10 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
-from db import get_user_subscriptions, add_subscription
+from db import get_user_subscriptions, add_subscription, run_db
 from handlers.subscriptions_repo import delete_subscription, delete_all_for_user
+from services.product_status import status_from_db
+from utils.text import chunk_lines
 from utils.urls import detect_brand
 router = Router()
 
@@ -11,29 +13,19 @@ router = Router()
 @router.message(Command("my_links"))
 async def cmd_my_links(message: Message):
     user_id = message.from_user.id
-    subs = get_user_subscriptions(user_id)
+    subs = await run_db(get_user_subscriptions, user_id)
 
     if not subs:
         await message.answer("У тебе поки немає збережених посилань для моніторингу.")
         return
 
-    # Формуємо текст і ріжемо на шматки, щоб не перевищити ліміт Telegram (~4096)
-    chunks: list[str] = []
-    current = "Твої посилання під моніторингом:\n\n"
-
-    def add_line(line: str):
-        nonlocal current, chunks
-        # 3500 беремо з запасом, щоб не впертись у 4096
-        if len(current) + len(line) + 1 > 3500:
-            chunks.append(current)
-            current = ""
-        current += line + "\n"
-
+    blocks: list[str] = []
     for row in subs:
-        status = row["last_status"] or "—"
+        product_status = status_from_db(row["status_data"], row["last_status"], row["brand"])
+        status = product_status.render_html(row["url"]) if product_status else "—"
         active = "✅ активне" if row["is_active"] else "⏹ вимкнене"
 
-        block = (
+        blocks.append(
             f"<b>ID:</b> <code>{row['id']}</code>\n"
             f"<b>URL:</b> {row['url']}\n"
             f"<b>Бренд:</b> {row['brand'] or '—'}\n"
@@ -42,10 +34,9 @@ async def cmd_my_links(message: Message):
             f"<b>Створено:</b> {row['created_at']}\n"
             "----------------------------\n"
         )
-        add_line(block)
 
-    if current.strip():
-        chunks.append(current)
+    # Ріжемо на шматки, щоб не перевищити ліміт Telegram (~4096)
+    chunks = chunk_lines(blocks, first="Твої посилання під моніторингом:\n\n")
 
     # Відправляємо по шматках
     for chunk in chunks:
@@ -72,7 +63,7 @@ async def cmd_del(message: Message):
         await message.answer("ID має бути числом. Приклад: <code>/del 12</code>")
         return
 
-    ok = delete_subscription(sub_id=sub_id, user_id=user_id)
+    ok = await run_db(delete_subscription, sub_id=sub_id, user_id=user_id)
     if ok:
         await message.answer(f"✅ Посилання з ID {sub_id} повністю видалено з моніторингу.")
     else:
@@ -82,7 +73,7 @@ async def cmd_del(message: Message):
 @router.message(Command("del_all"))
 async def cmd_del_all(message: Message):
     user_id = message.from_user.id
-    deleted_count = delete_all_for_user(user_id)
+    deleted_count = await run_db(delete_all_for_user, user_id)
     if deleted_count:
         await message.answer(f"⏹ Я повністю видалив {deleted_count} посилань з моніторингу.")
     else:
@@ -122,13 +113,14 @@ async def cmd_add(message: Message):
         sizes_list = [s.upper() for s in parts[2:]]
         sizes = ",".join(sizes_list)
 
-    # 👇 ГОЛОВНЕ: додаємо параметр last_status=None
-    add_subscription(
+    # 👇 ГОЛОВНЕ: status_data=None — перший запуск, нічого ще не знаємо
+    await run_db(
+        add_subscription,
         user_id=message.from_user.id,
         chat_id=message.chat.id,
         url=url,
         brand=brand,
-        last_status=None,   # перший запуск → нічого ще не знаємо
+        status_data=None,
         sizes=sizes or None,
     )
 
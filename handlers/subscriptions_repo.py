@@ -1,11 +1,4 @@
-import sqlite3
-from typing import Optional
-
-from db import DB_PATH
-
-
-def get_conn() -> sqlite3.Connection:
-    return sqlite3.connect(DB_PATH)
+from db import connection
 
 
 def delete_subscription(sub_id: int, user_id: int) -> bool:
@@ -13,8 +6,7 @@ def delete_subscription(sub_id: int, user_id: int) -> bool:
     Видаляє підписку фізично з БД.
     Повертає True, якщо щось реально видалили.
     """
-    conn = get_conn()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             "DELETE FROM subscriptions WHERE id = ? AND user_id = ?",
@@ -22,8 +14,6 @@ def delete_subscription(sub_id: int, user_id: int) -> bool:
         )
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
 
 
 def delete_all_for_user(user_id: int) -> int:
@@ -31,8 +21,7 @@ def delete_all_for_user(user_id: int) -> int:
     Видаляє всі підписки юзера фізично.
     Повертає кількість видалених рядків.
     """
-    conn = get_conn()
-    try:
+    with connection() as conn:
         cur = conn.cursor()
         cur.execute(
             "DELETE FROM subscriptions WHERE user_id = ?",
@@ -40,5 +29,3 @@ def delete_all_for_user(user_id: int) -> int:
         )
         conn.commit()
         return cur.rowcount
-    finally:
-        conn.close()
@@ -1,55 +1,109 @@
-import time
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import WebDriverException
+
+from services import readiness
+from services.product_status import (
+    ProductStatus,
+    ERROR_OPEN_FAILED,
+    ERROR_SIZES_NOT_FOUND,
+    SIZE_IN,
+    SIZE_OUT,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def parse_sizes(driver) -> List[Dict]:
+ADD_TO_CART_XPATH = "//button[@data-qa-anchor='addToCartSizeBtn']"
+SIZES_CONTAINER_XPATH = "//div[contains(@class,'size-selector-desktop-pdp__sizes')]"
+SIZE_BUTTONS_XPATH = SIZES_CONTAINER_XPATH + "//button[contains(@class,'ui--dot-item')]"
+
+# не сам контейнер: він зʼявляється порожнім, ще до того, як відрендеряться кнопки розмірів
+SIZES_CONTAINER = readiness.xpath("sizes", SIZE_BUTTONS_XPATH)
+ADD_TO_CART = readiness.xpath("add_to_cart", ADD_TO_CART_XPATH)
+SOLD_OUT = readiness.css("sold_out", ".product-detail-sold-out, [data-qa-anchor='soldOutLabel']")
+ERROR_PAGE = readiness.css("error", ".error-page, .page-not-found")
+
+# Сторінка товару «готова», щойно зʼявилось хоч щось із цього
+BERSHKA_PAGE_READY = [SIZES_CONTAINER, ADD_TO_CART, SOLD_OUT, ERROR_PAGE]
+BERSHKA_SIZES_READY = [SIZES_CONTAINER, SOLD_OUT, ERROR_PAGE]
+
+# Назва + всі розміри за ОДИН execute_script (замість ~5 WebDriver-викликів на кнопку).
+# Логіка «недоступний» та сама, що й у XPath-варіанті нижче.
+EXTRACT_PRODUCT_JS = """
+const h1 = document.querySelector(
+    "h1[class*='product-detail-info-layout__title'], h1[class*='product-detail-name']"
+);
+const root = document.querySelector("div[class*='size-selector-desktop-pdp__sizes']");
+if (!root) return null;
+const sizes = [];
+root.querySelectorAll("button[class*='ui--dot-item']").forEach(btn => {
+    const labelEl = btn.querySelector("span.text__label");
+    const label = labelEl ? (labelEl.innerText || labelEl.textContent || "").trim() : "";
+    const ariaDisabled = (btn.getAttribute("aria-disabled") || "").toLowerCase();
+    const ariaDesc = (btn.getAttribute("aria-description") || "").toLowerCase();
+    const unavailable = btn.hasAttribute("disabled")
+        || (btn.getAttribute("class") || "").includes("is-disabled")
+        || ariaDisabled === "true"
+        || ariaDesc.includes("розпродано");
+    sizes.push({size: label || "(без назви)", available: !unavailable});
+});
+return {name: h1 ? (h1.innerText || h1.textContent || "").trim() : "", sizes: sizes};
+"""
+
+
+def _wait_sizes(driver, report: readiness.ReadinessReport) -> Optional[str]:
+    # Раніше: чекали кнопку "Додати у кошик" (до 12 с), потім контейнер розмірів (до 10 с).
+    # Тепер чекаємо будь-що з: контейнер розмірів / «розпродано» / помилка.
+    state = report.wait(driver, BERSHKA_SIZES_READY, timeout=12, legacy=0)
+    if readiness.first_present(driver, [ADD_TO_CART]) is None:
+        logger.warning("⚠ Кнопка 'Додати у кошик' НЕ зʼявилась, парсинг може бути неточним.")
+        report.skip(legacy=12, event="no_add_to_cart")
+    return state
+
+
+def _extract_product_js(driver) -> Optional[Tuple[str, List[Dict]]]:
+    """
+    (назва, [{"size", "available"}, ...]) одним викликом execute_script.
+    None — якщо JS не спрацював або розмірів не знайшов (тоді йдемо в XPath).
+    """
+    try:
+        data = driver.execute_script(EXTRACT_PRODUCT_JS)
+    except Exception as e:
+        logger.info("BERSHKA JS extraction failed: %s", e)
+        return None
+
+    if not data or not data.get("sizes"):
+        return None
+    return (data.get("name") or "").strip(), data["sizes"]
+
+
+def parse_sizes(driver, report: Optional[readiness.ReadinessReport] = None) -> List[Dict]:
     """
     Парсить розміри Bershka тоді, коли сторінка повністю прогрузилась.
     Повертає список словників:
       {"size": "M", "available": True/False}
     """
-    sizes: List[Dict] = []
+    report = report or readiness.ReadinessReport("")
+    if _wait_sizes(driver, report) != "sizes":
+        return []
 
-    # 1️⃣ Чекаємо кнопку "Додати у кошик"
-    try:
-        WebDriverWait(driver, 12).until(
-            EC.presence_of_element_located(
-                (
-                    By.XPATH,
-                    "//button[@data-qa-anchor='addToCartSizeBtn']"
-                )
-            )
-        )
-    except Exception as e:
-        logger.warning("⚠ Кнопка 'Додати у кошик' НЕ зʼявилась, парсинг може бути неточним. %s", e)
+    extracted = _extract_product_js(driver)
+    if extracted is not None:
+        return extracted[1]
+    return _parse_sizes_xpath(driver)
 
-    # 2️⃣ Чекаємо появи контейнера з розмірами
-    try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
-                (
-                    By.XPATH,
-                    "//div[contains(@class,'size-selector-desktop-pdp__sizes')]"
-                )
-            )
-        )
-    except Exception as e:
-        return sizes
+
+def _parse_sizes_xpath(driver) -> List[Dict]:
+    """
+    Fallback: старий парсинг по кожній кнопці через WebDriver.
+    """
+    sizes: List[Dict] = []
 
     # 3️⃣ Знаходимо розміри
-    buttons = driver.find_elements(
-        By.XPATH,
-        "//div[contains(@class,'size-selector-desktop-pdp__sizes')]"
-        "//button[contains(@class,'ui--dot-item')]"
-    )
+    buttons = driver.find_elements(By.XPATH, SIZE_BUTTONS_XPATH)
 
     # 4️⃣ Обробляємо кожен розмір
     for btn in buttons:
@@ -80,78 +134,65 @@ def parse_sizes(driver) -> List[Dict]:
     return sizes
 
 
-def check_bershka_one(driver, url: str) -> str:
+def _read_name_xpath(driver) -> str:
+    name_els = driver.find_elements(
+        By.XPATH,
+        "//h1[contains(@class,'product-detail-info-layout__title') "
+        "or contains(@class,'product-detail-name')]",
+    )
+    if not name_els:
+        logger.debug("BERSHKA product name not found")
+        return ""
+    return name_els[0].text.strip()
+
+
+def check_bershka_one(driver, url: str) -> ProductStatus:
     """
     Перевіряє один товар Bershka через вже створений driver.
-    Повертає ТЕКСТ, з якого потім моніторинг дістає розміри.
-
-    ВАЖЛИВО: для кожного розміру окремий рядок виду:
-        🟢 34
-        🔴 36
-    Це такий самий формат, як у Zara (check_zara),
-    і під нього написана extract_available_sizes().
+    Повертає ProductStatus — так само, як check_zara.
+    Текст для бота («🟢 34» / «🔴 36» по рядках) робить ProductStatus.render_html().
     """
     logger.info("Checking BERSHKA URL: %s", url)
 
     try:
-        driver.get(url)
+        opened = readiness.navigate(driver, url)
     except WebDriverException as e:
         logger.warning("❗ Помилка відкриття сторінки %s: %s", url, e)
-        return "⚠️ Помилка відкриття сторінки"
+        opened = False
+    if not opened:
+        return ProductStatus(brand="bershka", error=ERROR_OPEN_FAILED)
 
-    # даємо сторінці прогрузитися
-    time.sleep(2)
+    # раніше: time.sleep(2) «даємо сторінці прогрузитися» — тепер чекаємо на готовність
+    report = readiness.ReadinessReport(url)
+    report.wait(driver, BERSHKA_PAGE_READY, timeout=15, legacy=2)
 
-    # Назва товару (по бажанню — для логів/майбутнього)
-    product_name = ""
-    try:
-        name_el = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
-                (
-                    By.XPATH,
-                    "//h1[contains(@class,'product-detail-info-layout__title') "
-                    "or contains(@class,'product-detail-name')]",
-                )
-            )
-        )
-        product_name = name_el.text.strip()
-    except Exception:
-        logger.debug("BERSHKA product name not found")
-
-    # Парсимо розміри
-    sizes = parse_sizes(driver)
-
-    # Загальний статус
-    if sizes:
-        any_available = any(s["available"] for s in sizes)
-        if any_available:
-            general_status = "📦 Статус: Є в наявності"
-        else:
-            general_status = "📦 Статус: Немає в наявності"
-    else:
-        general_status = "📦 Статус: 😕 Не вдалося визначити наявність"
-
-    # ==== Формуємо текст так само, як для Zara ====
-    lines: List[str] = []
-
-    # Назву бренду можна не додавати — в заголовку й так є "Товар Bershka"
-    if product_name:
-        lines.append(f"🔗 <a href=\"{url}\">{product_name}</a>")
-    else:
-        lines.append(f"🔗 <a href=\"{url}\">Посилання на товар</a>")
-    lines.append(general_status)
-    lines.append("")
-
-    if sizes:
-        lines.append("📏 Розміри:")
-        for s in sizes:
-            mark = "🟢" if s["available"] else "🔴"
-            # КЛЮЧОВИЙ формат: емодзі + пробіл + розмір
-            lines.append(f"{mark} {s['size']}")
+    # Назва + розміри: одним JS-викликом, а якщо не вийшло — старим XPath-шляхом
+    sizes: List[Dict] = []
+    extracted = None
+    sizes_state = _wait_sizes(driver, report)
+    if sizes_state is not None:
+        # розміри (або «розпродано») вже в DOM — решту сторінки не довантажуємо
+        readiness.stop_loading(driver)
+    if sizes_state == "sizes":
+        extracted = _extract_product_js(driver)
+
+    if extracted is not None:
+        product_name, sizes = extracted
     else:
-        lines.append("📏 Розміри: (не знайдено)")
-    result_text = "\n".join(lines)
-    logger.info("📤 Фінальний текст статусу:\n%s", result_text)
+        # Назва товару (по бажанню — для логів/майбутнього)
+        product_name = _read_name_xpath(driver)
+        if readiness.first_present(driver, [SIZES_CONTAINER]) is not None:
+            sizes = _parse_sizes_xpath(driver)
+    report.log()
+
+    status = ProductStatus(
+        brand="bershka",
+        name=product_name,
+        sizes=tuple((s["size"], SIZE_IN if s["available"] else SIZE_OUT) for s in sizes),
+        # «розпродано» без кнопок розмірів — товар закінчився повністю, це не збій перевірки
+        error=None if sizes or sizes_state == "sold_out" else ERROR_SIZES_NOT_FOUND,
+    )
+    logger.info("📤 Фінальний статус: %s", status.to_json())
     logger.info("======================================================")
 
-    return result_text
+    return status
@@ -0,0 +1,73 @@
+import glob
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Set
+
+from services.readiness import navigate
+from services.resource_filter import apply_resource_filter
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileSlots:
+    """
+    Постійні каталоги профілю Chrome під root: slot-0, slot-1, ...
+
+    Chrome не дає двом живим процесам один user-data-dir, тож кожен браузер пулу
+    тримає свій слот, а після перезапуску driver'а новий бере звільнений —
+    разом з його HTTP-кешем, кукі і TLS-сесіями.
+    Новий слот ініціалізується копією template (якщо заданий).
+    """
+
+    def __init__(self, root: str, template: Optional[str] = None):
+        self._root = root
+        self._template = template
+        self._lock = threading.Lock()
+        self._busy: Set[int] = set()
+        os.makedirs(root, exist_ok=True)
+
+    def acquire(self) -> str:
+        with self._lock:
+            index = 0
+            while index in self._busy:
+                index += 1
+            self._busy.add(index)
+
+        path = os.path.join(self._root, f"slot-{index}")
+        try:
+            if not os.path.isdir(path) and self._template:
+                shutil.copytree(self._template, path)
+            os.makedirs(path, exist_ok=True)
+            # слот наш — lock-файли лишились від браузера, що впав
+            for lock in glob.glob(os.path.join(path, "Singleton*")):
+                os.remove(lock)
+        except BaseException:
+            self.release(path)
+            raise
+        return path
+
+    def release(self, path: Optional[str]):
+        if not path:
+            return
+        try:
+            index = int(os.path.basename(path).rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return
+        with self._lock:
+            self._busy.discard(index)
+
+
+def prewarm(driver, origins: Dict[str, str]):
+    """
+    Відкриває головну сторінку кожного бренду (з його фільтром ресурсів):
+    DNS, TLS і JS-бандли підтягуються до першої справжньої перевірки.
+    Помилки не критичні — перша сторінка тоді просто буде «холодною».
+    """
+    for brand, origin in origins.items():
+        try:
+            apply_resource_filter(driver, brand)
+            navigate(driver, origin)
+        except Exception as e:
+            logger.warning("Prewarm failed for %s: %s", origin, e)
@@ -0,0 +1,54 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from selenium.common.exceptions import WebDriverException
+
+from config import CONSENT_COOKIE_DOMAINS, ONETRUST_CONSENT_GROUPS, STORE_COOKIES
+
+logger = logging.getLogger(__name__)
+
+COOKIE_TTL = 365 * 24 * 60 * 60
+
+
+def consent_cookies() -> List[Dict]:
+    """
+    Кукі для CDP Network.setCookies: згода OneTrust на кожному домені + STORE_COOKIES.
+    OptanonAlertBoxClosed — саме він ховає банер; OptanonConsent — які групи дозволені.
+    """
+    now = datetime.now(timezone.utc)
+    expires = time.time() + COOKIE_TTL
+    cookies = []
+    for domain in CONSENT_COOKIE_DOMAINS:
+        cookies.append({
+            "name": "OptanonAlertBoxClosed",
+            "value": now.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "domain": domain,
+        })
+        cookies.append({
+            "name": "OptanonConsent",
+            "value": f"isGpcEnabled=0&datestamp={now.isoformat()}&groups={ONETRUST_CONSENT_GROUPS}"
+                     "&AwaitingReconsent=false",
+            "domain": domain,
+        })
+    cookies.extend(dict(c) for c in STORE_COOKIES)
+
+    for cookie in cookies:
+        cookie.setdefault("path", "/")
+        cookie.setdefault("secure", True)
+        cookie.setdefault("expires", expires)
+    return cookies
+
+
+def preseed_cookies(driver) -> bool:
+    """
+    Кладе кукі згоди / магазину в браузер до першої сторінки.
+    False — якщо CDP недоступний (тоді банери закриваються кліком, як раніше).
+    """
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": consent_cookies()})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        logger.warning("Consent cookies not pre-seeded: %s", e)
+        return False
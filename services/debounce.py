@@ -0,0 +1,76 @@
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from config import DEBOUNCE_DEFAULT, DEBOUNCE_RULES
+
+
+class Debouncer:
+    """
+    Антифлапінг наявності розмірів для кожної підписки.
+
+    Нова наявність (fingerprint) не комітиться одразу, а стає «кандидатом».
+    Кандидат підтверджується, коли:
+    - його побачили K перевірок поспіль, або
+    - він тримається вже dwell секунд (від першого спостереження).
+    Якщо до підтвердження наявність повернулась до збереженої або змінилась
+    на іншу — кандидат відкидається, а його записи / сповіщення рахуються як придушені.
+
+    (K, dwell) — по бренду з DEBOUNCE_RULES, інакше DEBOUNCE_DEFAULT.
+    """
+
+    def __init__(
+        self,
+        rules: Mapping[str, Tuple[int, float]] = DEBOUNCE_RULES,
+        default: Tuple[int, float] = DEBOUNCE_DEFAULT,
+    ):
+        self._rules = dict(rules)
+        self._default = default
+        # sub_id → [fingerprint кандидата, скільки разів бачили, коли вперше, чи дав би сповіщення]
+        self._pending: Dict[int, list] = {}
+        self.suppressed_writes = 0
+        self.suppressed_sends = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def observe(self, sub_id: int, brand: Optional[str], candidate: str, would_send: bool) -> bool:
+        """
+        Спостереження, що відрізняється від збереженого стану.
+        True — зміну підтверджено, її треба комітити (і сповіщати).
+        """
+        k, dwell = self._rules.get(brand or "", self._default)
+        now = time.monotonic()
+
+        entry = self._pending.get(sub_id)
+        if entry is None or entry[0] != candidate:
+            if entry is not None:
+                self._suppress(entry)
+            entry = self._pending[sub_id] = [candidate, 0, now, False]
+        entry[1] += 1
+        entry[3] = entry[3] or would_send
+
+        if entry[1] >= k or (dwell and now - entry[2] >= dwell):
+            del self._pending[sub_id]
+            return True
+        return False
+
+    def discard(self, sub_id: int):
+        """
+        Наявність повернулась до збереженої — кандидат (якщо був) відкидається.
+        """
+        entry = self._pending.pop(sub_id, None)
+        if entry is not None:
+            self._suppress(entry)
+
+    def retain(self, sub_ids: Iterable[int]):
+        """
+        Забуває кандидатів підписок, яких більше немає.
+        """
+        keep = set(sub_ids)
+        for sub_id in [s for s in self._pending if s not in keep]:
+            del self._pending[sub_id]
+
+    def _suppress(self, entry: list):
+        self.suppressed_writes += entry[1]
+        if entry[3]:
+            self.suppressed_sends += 1
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from selenium import webdriver
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """
+    Обгортка над driver'ом з пулу.
+    Рахує скільки сторінок він уже відкрив і чи не зламався.
+    """
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+        self.created_at = time.monotonic()
+        # довільний стан, привʼязаний до цього браузера (напр. який фільтр ресурсів уже ввімкнено)
+        self.state: Dict[str, Any] = {}
+
+    def mark_page(self):
+        self.pages += 1
+
+    def mark_broken(self):
+        self.broken = True
+
+
+class DriverPool:
+    """
+    Потокобезпечний пул довгоживучих Chrome-драйверів.
+
+    - acquire()/release() — видати і повернути driver
+    - перед видачею робимо health-check (якщо браузер помер — створюємо новий)
+    - driver перезапускається після max_pages сторінок або якщо його позначили broken
+    - max_size — скільки браузерів максимум живе одночасно (і видано, і в простої)
+    - dispose(driver) — викликається після quit() (напр. звільнити каталог профілю)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], webdriver.Chrome],
+        max_size: int = 5,
+        max_pages: int = 100,
+        dispose: Optional[Callable[[webdriver.Chrome], None]] = None,
+    ):
+        self._factory = factory
+        self._dispose = dispose
+        self._max_size = max_size
+        self._max_pages = max_pages
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle: List[PooledDriver] = []
+        self._closed = False
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """
+        Видає driver з пулу (або створює новий, якщо вільних немає).
+        Блокується, поки не звільниться слот (або до timeout → TimeoutError).
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("DriverPool: no free driver slot")
+
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("DriverPool is closed")
+                    item = self._idle.pop() if self._idle else None
+
+                if item is None:
+                    logger.info("DriverPool: creating new driver")
+                    return PooledDriver(self._factory())
+
+                if self._is_healthy(item):
+                    return item
+
+                logger.warning("DriverPool: driver failed health-check, recycling")
+                self._quit(item)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, item: PooledDriver):
+        """
+        Повертає driver у пул.
+        Зламані або «зношені» (max_pages) драйвери закриваються.
+        """
+        try:
+            if item.broken or item.pages >= self._max_pages:
+                logger.info(
+                    "DriverPool: recycling driver (broken=%s, pages=%s)",
+                    item.broken, item.pages,
+                )
+                self._quit(item)
+                return
+
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(item)
+                    return
+            self._quit(item)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        with pool.lease() as item:
+            item.driver.get(...)
+        Якщо всередині вилетів виняток — driver вважаємо зламаним.
+        """
+        item = self.acquire(timeout=timeout)
+        try:
+            yield item
+        except BaseException:
+            item.mark_broken()
+            raise
+        finally:
+            self.release(item)
+
+    def close(self):
+        """
+        Закриває всі драйвери в простої. Видані закриються при release().
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for item in idle:
+            self._quit(item)
+
+    @staticmethod
+    def _is_healthy(item: PooledDriver) -> bool:
+        try:
+            item.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, item: PooledDriver):
+        try:
+            item.driver.quit()
+        except Exception as e:
+            logger.warning("DriverPool: error on driver.quit(): %s", e)
+        if self._dispose is not None:
+            try:
+                self._dispose(item.driver)
+            except Exception as e:
+                logger.warning("DriverPool: error on dispose: %s", e)
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qs
+
+import aiohttp
+
+from config import DEFAULT_HEADERS, REQUEST_TIMEOUT, HTTP_FAST_PATH_CONCURRENCY, HTTP_FAST_PATH_ORIGINS
+from services.product_status import ProductStatus, SIZE_IN, SIZE_LOW, SIZE_OUT
+from utils.urls import detect_brand
+
+logger = logging.getLogger(__name__)
+
+# (назва, [(розмір, стан), ...])
+ParsedSizes = Tuple[str, List[Tuple[str, int]]]
+
+LD_JSON_RE = re.compile(
+    r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.S | re.I,
+)
+
+# availability з JSON Zara → стан розміру (все інше — SIZE_OUT)
+ZARA_AVAILABILITY_STATES = {
+    "in_stock": SIZE_IN,
+    "low_on_stock": SIZE_LOW,
+}
+
+# schema.org availability → стан розміру
+LD_AVAILABILITY_STATES = {
+    "instock": SIZE_IN,
+    "limitedavailability": SIZE_LOW,
+}
+
+
+class HttpAvailabilityFetcher:
+    """
+    Швидкий шлях без браузера: тягне наявність розмірів через aiohttp
+    з JSON-даних товару (Zara: ?ajax=true) або з вбудованого ld+json на сторінці.
+
+    fetch(url) повертає ProductStatus, як check_zara / check_bershka_one,
+    або None — тоді треба йти в Selenium.
+
+    origins — підміна scheme+host по бренду, напр. {"zara": "http://127.0.0.1:8080"},
+    щоб ганяти fetcher проти локального stub-сервера з записаними відповідями
+    (за замовчуванням — HTTP_FAST_PATH_ORIGINS, див. check_http_fast_path.py).
+    """
+
+    def __init__(
+        self,
+        origins: Optional[Dict[str, str]] = None,
+        concurrency: int = HTTP_FAST_PATH_CONCURRENCY,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self._origins = HTTP_FAST_PATH_ORIGINS if origins is None else origins
+        self._sem = asyncio.Semaphore(concurrency)
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> Optional[ProductStatus]:
+        brand = detect_brand(url)
+        if brand not in {"zara", "bershka"}:
+            return None
+
+        async with self._sem:
+            try:
+                if brand == "zara":
+                    parsed = await self._fetch_zara(url)
+                else:
+                    parsed = await self._fetch_bershka(url)
+                status = None
+                if parsed is not None:
+                    name, sizes = parsed
+                    status = ProductStatus(brand=brand, name=name, sizes=tuple(sizes))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.info("FAST PATH failed url=%s err=%r", url, e)
+                status = None
+            except Exception as e:
+                logger.exception("FAST PATH unexpected error url=%s: %s", url, e)
+                status = None
+
+        if status is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return status
+
+    async def fetch_many(self, urls: List[str]) -> Dict[str, ProductStatus]:
+        """
+        Паралельно (в межах concurrency) проганяє urls через швидкий шлях.
+        Повертає {url: status} тільки для тих, що вдалось отримати без браузера.
+        """
+        statuses = await asyncio.gather(*(self.fetch(u) for u in urls))
+        return {u: st for u, st in zip(urls, statuses) if st is not None}
+
+    # ---------- Zara ----------
+
+    async def _fetch_zara(self, url: str) -> Optional[ParsedSizes]:
+        data = await self._get_json(url, extra_query="ajax=true")
+        parsed = parse_zara_product_json(data, url) if data is not None else None
+        if parsed is None:
+            html = await self._get_text(url)
+            parsed = parse_ld_json_sizes(html) if html else None
+        return parsed
+
+    # ---------- Bershka ----------
+
+    async def _fetch_bershka(self, url: str) -> Optional[ParsedSizes]:
+        html = await self._get_text(url)
+        return parse_ld_json_sizes(html) if html else None
+
+    # ---------- HTTP ----------
+
+    def _session_or_create(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=self._timeout)
+        return self._session
+
+    def _target(self, url: str, extra_query: str = "") -> str:
+        parts = urlsplit(url)
+        origin = self._origins.get(detect_brand(url) or "")
+        scheme, netloc = parts.scheme, parts.netloc
+        if origin:
+            o = urlsplit(origin)
+            scheme, netloc = o.scheme, o.netloc
+        query = parts.query
+        if extra_query:
+            query = f"{query}&{extra_query}" if query else extra_query
+        return urlunsplit((scheme, netloc, parts.path, query, ""))
+
+    async def _get_text(self, url: str) -> Optional[str]:
+        session = self._session_or_create()
+        async with session.get(self._target(url)) as resp:
+            if resp.status != 200:
+                logger.info("FAST PATH http=%s url=%s", resp.status, url)
+                return None
+            return await resp.text()
+
+    async def _get_json(self, url: str, extra_query: str = "") -> Optional[dict]:
+        session = self._session_or_create()
+        async with session.get(
+            self._target(url, extra_query),
+            headers={"Accept": "application/json"},
+        ) as resp:
+            if resp.status != 200:
+                logger.info("FAST PATH http=%s url=%s", resp.status, url)
+                return None
+            try:
+                return await resp.json(content_type=None)
+            except json.JSONDecodeError:
+                return None
+
+
+def parse_zara_product_json(data: dict, url: str) -> Optional[ParsedSizes]:
+    """
+    JSON сторінки товару Zara (?ajax=true) → (назва, [(розмір, стан), ...]).
+    Колір вибираємо по v1 з URL, інакше беремо перший.
+    """
+    product = (data or {}).get("product") or {}
+    colors = (product.get("detail") or {}).get("colors") or []
+    if not colors:
+        return None
+
+    v1 = (parse_qs(urlsplit(url).query).get("v1") or [""])[0]
+    color = next((c for c in colors if v1 and str(c.get("productId")) == v1), colors[0])
+
+    sizes: List[Tuple[str, int]] = []
+    for size in color.get("sizes") or []:
+        label = str(size.get("name") or "").strip()
+        if not label:
+            continue
+        availability = str(size.get("availability") or "").lower()
+        sizes.append((label, ZARA_AVAILABILITY_STATES.get(availability, SIZE_OUT)))
+
+    if not sizes:
+        return None
+    return str(product.get("name") or "").strip(), sizes
+
+
+def parse_ld_json_sizes(html: str) -> Optional[ParsedSizes]:
+    """
+    Вбудовані дані сторінки (schema.org Product / ProductGroup в ld+json)
+    → (назва, [(розмір, стан), ...]). None, якщо розмірів там немає.
+    """
+    for raw in LD_JSON_RE.findall(html or ""):
+        try:
+            data = json.loads(raw.strip())
+        except json.JSONDecodeError:
+            continue
+
+        for obj in data if isinstance(data, list) else [data]:
+            if not isinstance(obj, dict):
+                continue
+            if obj.get("@type") not in ("Product", "ProductGroup"):
+                continue
+
+            variants = obj.get("hasVariant") or []
+            offers = obj.get("offers") or []
+            if isinstance(offers, dict):
+                offers = [offers]
+
+            sizes: List[Tuple[str, int]] = []
+            for item in variants + offers:
+                if not isinstance(item, dict):
+                    continue
+                label = str(item.get("size") or "").strip()
+                offer = item.get("offers") if "offers" in item else item
+                if isinstance(offer, list):
+                    offer = offer[0] if offer else {}
+                availability = str((offer or {}).get("availability") or "")
+                if not label:
+                    continue
+                key = availability.rsplit("/", 1)[-1].lower()
+                sizes.append((label, LD_AVAILABILITY_STATES.get(key, SIZE_OUT)))
+
+            if sizes:
+                return str(obj.get("name") or "").strip(), sizes
+
+    return None
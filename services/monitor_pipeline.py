@@ -0,0 +1,188 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from services.product_status import ProductStatus
+from services.selenium_parser import url_worker
+
+logger = logging.getLogger(__name__)
+
+LAG_WINDOW = 200  # скільки останніх вимірів lag тримати для статистики
+
+
+class MonitorPipeline:
+    """
+    Безперервний конвеєр моніторингу для всіх чатів одразу.
+
+    - кожен URL має свій дедлайн (due, unix time): коли його знову треба перевірити
+    - дедлайни лежать у пріоритетній черзі (heap), dispatch() бере найтерміновіші
+    - browser worker'и (потоки з драйверами з пулу) безперервно беруть URL з черги
+    - після перевірки URL отримує дедлайн now + refresh_interval,
+      який потім можна уточнити через reschedule() (адаптивний планувальник)
+
+    lag — наскільки пізніше від свого дедлайну URL реально взяли в роботу.
+    Якщо lag росте — worker'ів не вистачає на цільовий інтервал оновлення.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        refresh_interval: float,
+        on_result: Callable[[str, ProductStatus], None],
+    ):
+        self._workers = workers
+        self._refresh_interval = refresh_interval
+        self._on_result = on_result
+
+        self._lock = threading.Lock()
+        self._tasks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._due: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        # скільки URL максимум чекає в черзі worker'ів — решта лишається в heap,
+        # щоб термінові URL не стояли за довгим хвостом
+        self._max_backlog = workers * 2
+        self._queued: Set[str] = set()
+        self._lags: deque = deque(maxlen=LAG_WINDOW)
+        self._threads: List[threading.Thread] = []
+        self._checked = 0
+
+    # ---------- життєвий цикл ----------
+
+    def start(self):
+        for i in range(self._workers):
+            t = threading.Thread(
+                target=url_worker,
+                args=(self._next_url, self._handle_result),
+                name=f"monitor-worker-{i}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+        logger.info("MonitorPipeline started: workers=%s interval=%ss", self._workers, self._refresh_interval)
+
+    def stop(self, timeout: float = 30):
+        for _ in self._threads:
+            self._tasks.put(None)
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads.clear()
+
+    # ---------- план ----------
+
+    def sync_urls(self, due: Mapping[str, Optional[float]]):
+        """
+        Синхронізує набір URL під моніторингом: {url: next_check_at або None}.
+        Нові URL без дедлайну — одразу «прострочені», видалені — більше не плануються.
+        Для відомих URL беремо раніший з двох дедлайнів.
+        """
+        now = time.time()
+        with self._lock:
+            for url in list(self._due):
+                if url not in due:
+                    del self._due[url]
+            for url, at in due.items():
+                at = now if at is None else at
+                current = self._due.get(url)
+                if current is None or at < current:
+                    self._push(url, at)
+
+    def reschedule(self, url: str, at: float):
+        """
+        Ставить URL новий дедлайн (якщо URL ще під моніторингом).
+        """
+        with self._lock:
+            if url in self._due:
+                self._push(url, at)
+
+    def dispatch(self) -> int:
+        """
+        Кладе в чергу browser worker'ів URL, в яких настав дедлайн (найтерміновіші першими).
+        Повертає скільки URL поставили в чергу.
+        """
+        due = self.take_due(limit=max(0, self._max_backlog - self._tasks.qsize()))
+        for url in due:
+            self.submit(url)
+        return len(due)
+
+    def take_due(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Забирає URL, в яких настав дедлайн (найтерміновіші першими), і позначає їх «в роботі».
+        Далі кожен URL треба або submit() в браузер, або complete() з готовим статусом.
+        """
+        now = time.time()
+        taken: List[str] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                if limit is not None and len(taken) >= limit:
+                    break
+                at, url = heapq.heappop(self._heap)
+                # застарілий запис heap: дедлайн уже змінили або URL видалили
+                if self._due.get(url) != at or url in self._queued:
+                    continue
+                self._queued.add(url)
+                self._lags.append(now - at)
+                taken.append(url)
+        return taken
+
+    def backlog_full(self) -> bool:
+        """
+        True, якщо browser worker'и вже мають достатньо роботи в черзі.
+        """
+        return self._tasks.qsize() >= self._max_backlog
+
+    def submit(self, url: str):
+        """
+        Віддає взятий через take_due() URL browser worker'ам.
+        """
+        self._tasks.put(url)
+
+    def complete(self, url: str, status: ProductStatus):
+        """
+        Результат, отриманий в обхід браузера (напр. HTTP fast path).
+        """
+        self._handle_result(url, status)
+
+    def _push(self, url: str, at: float):
+        self._due[url] = at
+        heapq.heappush(self._heap, (at, url))
+        # heap накопичує застарілі записи після reschedule — періодично перебудовуємо
+        if len(self._heap) > 4 * len(self._due) + 100:
+            self._heap = [(t, u) for u, t in self._due.items()]
+            heapq.heapify(self._heap)
+
+    # ---------- worker callbacks (викликаються з потоків) ----------
+
+    def _next_url(self) -> Optional[str]:
+        return self._tasks.get()
+
+    def _handle_result(self, url: str, status: ProductStatus):
+        with self._lock:
+            self._queued.discard(url)
+            if url in self._due:
+                self._push(url, time.time() + self._refresh_interval)
+            self._checked += 1
+        self._on_result(url, status)
+
+    # ---------- метрики ----------
+
+    def stats(self) -> dict:
+        """
+        lag_avg / lag_max — по останніх LAG_WINDOW перевірках, в секундах.
+        """
+        lags = list(self._lags)
+        with self._lock:
+            tracked = len(self._due)
+            checked = self._checked
+            heap_size = len(self._heap)
+        return {
+            "tracked": tracked,
+            "queued": self._tasks.qsize(),
+            "checked": checked,
+            "heap": heap_size,
+            "lag_avg": sum(lags) / len(lags) if lags else 0.0,
+            "lag_max": max(lags) if lags else 0.0,
+        }
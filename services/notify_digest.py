@@ -0,0 +1,16 @@
+from typing import List, Sequence, Tuple
+
+from utils.text import chunk_lines
+
+DIGEST_HEADER = "🆕 <b>Зміни в наявності!</b>\n\n"
+
+
+def render_digest(items: Sequence[Tuple[str, str]]) -> List[str]:
+    """
+    Сповіщення одного чату, що накопичились за вікно злиття: [(повний текст, запис для дайджесту), ...].
+    Одне сповіщення — шлемо його звичайний текст; кілька — дайджест,
+    порізаний на повідомлення по MESSAGE_CHUNK_LIMIT.
+    """
+    if len(items) == 1:
+        return [items[0][0]]
+    return chunk_lines((entry for _, entry in items), first=DIGEST_HEADER)
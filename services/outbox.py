@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from config import (
+    NOTIFY_COALESCE_WINDOW,
+    OUTBOX_CLAIM_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETENTION,
+    OUTBOX_RETRY_DELAY,
+    OUTBOX_WORKERS,
+)
+from db import ack_outbox, claim_outbox, purge_outbox, retry_outbox, run_db
+from services.notify_digest import render_digest
+from services.telegram_sender import SendScheduler
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60 * 60  # сек між чистками старих рядків outbox
+
+
+class OutboxDelivery:
+    """
+    Розсилка сповіщень з таблиці outbox окремим пулом async-worker'ів.
+
+    Моніторинг тільки пише сповіщення в outbox (в одній транзакції зі статусом),
+    а тут poller забирає готові групи по чатах (claim_outbox: вікно злиття + оренда),
+    worker'и зливають їх у дайджест і шлють через SendScheduler.
+    Після успіху — ack, після невдачі — retry з backoff. Процес впав посеред
+    відправки — оренда закінчиться і група піде ще раз (at-least-once).
+    """
+
+    def __init__(
+        self,
+        sender: SendScheduler,
+        workers: int = OUTBOX_WORKERS,
+        window: float = NOTIFY_COALESCE_WINDOW,
+    ):
+        self._sender = sender
+        self._workers = workers
+        self._window = window
+        self._queue: "asyncio.Queue[Tuple[int, list]]" = asyncio.Queue(maxsize=workers * 2)
+        self._wake = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        self.delivered = 0
+        self.messages = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def start(self):
+        self._tasks.append(asyncio.create_task(self._poll()))
+        for _ in range(self._workers):
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    def notify(self):
+        """
+        Підказка poller'у, що в outbox щойно щось записали.
+        """
+        self._wake.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ---------- poller ----------
+
+    async def _poll(self):
+        next_purge = 0.0
+        while True:
+            try:
+                free = self._queue.maxsize - self._queue.qsize()
+                groups = await run_db(claim_outbox, free, self._window, OUTBOX_CLAIM_LEASE) if free else []
+                for group in groups:
+                    await self._queue.put(group)
+
+                if time.monotonic() >= next_purge:
+                    await run_db(purge_outbox, OUTBOX_RETENTION)
+                    next_purge = time.monotonic() + PURGE_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("OUTBOX poll error: %s", e)
+                groups = []
+
+            if not groups:
+                await self._sleep_or_wake(OUTBOX_POLL_INTERVAL)
+
+    async def _sleep_or_wake(self, timeout: Optional[float]):
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    # ---------- workers ----------
+
+    async def _work(self):
+        while True:
+            chat_id, rows = await self._queue.get()
+            try:
+                await self._deliver(chat_id, rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("OUTBOX deliver error chat=%s: %s", chat_id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, chat_id: int, rows: list):
+        ids = [r["id"] for r in rows]
+        messages = render_digest([(r["text"], r["digest_entry"] or r["text"]) for r in rows])
+
+        results = []
+        for text in messages:
+            results.append(await self._sender.send(chat_id, text, parse_mode="HTML"))
+        ok = all(await asyncio.gather(*results))
+
+        if ok:
+            await run_db(ack_outbox, ids)
+            self.delivered += len(ids)
+            self.messages += len(messages)
+            logger.info("OUTBOX SENT chat=%s notifications=%s messages=%s", chat_id, len(ids), len(messages))
+            return
+
+        attempts = max(r["attempts"] for r in rows) + 1
+        dropped = await run_db(retry_outbox, ids, OUTBOX_RETRY_DELAY * attempts, OUTBOX_MAX_ATTEMPTS)
+        self.retried += len(ids) - dropped
+        self.dropped += dropped
+        logger.warning("OUTBOX RETRY chat=%s notifications=%s attempt=%s dropped=%s", chat_id, len(ids), attempts, dropped)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "delivered": self.delivered,
+            "messages": self.messages,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
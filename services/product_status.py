@@ -0,0 +1,225 @@
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import FrozenSet, List, Optional, Tuple
+
+# Види помилок перевірки (ProductStatus.error)
+ERROR_OPEN_FAILED = "open_failed"  # сторінку не вдалось відкрити
+ERROR_NO_ADD_TO_CART = "no_add_to_cart"  # немає кнопки кошика → розміри не дістати
+ERROR_SIZES_NOT_FOUND = "sizes_not_found"  # сторінка є, а розмірів не знайшли
+ERROR_UNSUPPORTED = "unsupported"  # не Zara/Bershka
+ERROR_WORKER = "worker"  # впав worker / driver
+ERROR_TIMEOUT = "timeout"  # сторінка не вклалась у свій дедлайн
+
+# Збої самої перевірки: такий результат нічого не каже про наявність товару
+FETCH_ERRORS = frozenset({ERROR_OPEN_FAILED, ERROR_WORKER, ERROR_TIMEOUT})
+
+# Стан розміру: 0 — немає, 1 — є, 2 — мало залишилось (🟡)
+SIZE_OUT = 0
+SIZE_IN = 1
+SIZE_LOW = 2
+
+SIZE_MARKS = {SIZE_OUT: "🔴", SIZE_IN: "🟢", SIZE_LOW: "🟡"}
+MARK_TO_STATE = {mark: state for state, mark in SIZE_MARKS.items()}
+
+
+def normalize_size(label: str) -> str:
+    """
+    Ключ розміру для порівнянь: перше «слово» у верхньому регістрі ("m (EU 38)" → "M"),
+    як у старому extract_available_sizes — і так само для фільтра sizes підписки.
+    """
+    parts = label.split()
+    return parts[0].upper() if parts else ""
+
+
+@dataclass(frozen=True)
+class ProductStatus:
+    """
+    Результат перевірки одного товару.
+    sizes — кортеж (розмір, стан) у порядку як на сайті, стан — SIZE_OUT / SIZE_IN / SIZE_LOW.
+    В БД зберігається як компактний JSON (to_json), в HTML рендериться тільки перед відправкою.
+    """
+
+    brand: Optional[str]
+    name: str = ""
+    sizes: Tuple[Tuple[str, int], ...] = ()
+    error: Optional[str] = None
+    _available: FrozenSet[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_available",
+            frozenset(normalize_size(label) for label, state in self.sizes if state != SIZE_OUT) - {""},
+        )
+
+    @property
+    def available_sizes(self) -> FrozenSet[str]:
+        """
+        Розміри в наявності (🟢 і 🟡), через normalize_size — як раніше extract_available_sizes.
+        """
+        return self._available
+
+    @property
+    def low_stock(self) -> bool:
+        return any(state == SIZE_LOW for _, state in self.sizes)
+
+    @property
+    def fetch_failed(self) -> bool:
+        """
+        Сторінку не отримали (не відкрилась / впав worker / дедлайн) — на відміну від
+        «товар розпродано» чи «розмірів немає», це не стан товару.
+        """
+        return self.error in FETCH_ERRORS
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Стабільний хеш нормалізованої наявності (розміри, їх стани і вид помилки).
+        Назва товару та інша «косметика» не враховуються — однаковий fingerprint
+        означає, що для моніторингу нічого не змінилось.
+        """
+        payload = "|".join(f"{normalize_size(label)}:{state}" for label, state in self.sizes)
+        raw = f"{self.error or ''}#{payload}".encode("utf-8")
+        return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+    # ---------- серіалізація ----------
+
+    def to_json(self) -> str:
+        data: dict = {"b": self.brand, "n": self.name, "s": [list(s) for s in self.sizes]}
+        if self.error:
+            data["e"] = self.error
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ProductStatus":
+        data = json.loads(raw)
+        return cls(
+            brand=data.get("b"),
+            name=data.get("n") or "",
+            sizes=tuple((str(label), int(state)) for label, state in data.get("s") or []),
+            error=data.get("e"),
+        )
+
+    @classmethod
+    def from_legacy_text(cls, text: str, brand: Optional[str]) -> "ProductStatus":
+        """
+        Старі рядки БД, де в last_status лежить HTML-текст статусу ("🟢 M" / "🔴 L" ...).
+        """
+        sizes: List[Tuple[str, int]] = []
+        for raw_line in (text or "").splitlines():
+            line = raw_line.strip().lstrip("• ").strip()
+            mark = next((m for m in MARK_TO_STATE if m in line), None)
+            if mark is None:
+                continue
+            label = re.sub(r"<.*?>", "", line.split(mark, 1)[1]).strip()
+            if label:
+                sizes.append((normalize_size(label), MARK_TO_STATE[mark]))
+        return cls(brand=brand, sizes=tuple(sizes), error=None if sizes else ERROR_SIZES_NOT_FOUND)
+
+    # ---------- HTML ----------
+
+    def render_html(self, url: str) -> str:
+        """
+        Текст статусу для Telegram (той самий формат, що раніше повертали парсери).
+        """
+        if self.error == ERROR_UNSUPPORTED:
+            return "❗ Непідтримуваний домен (не Zara/Bershka)"
+        if self.error == ERROR_WORKER:
+            return "⚠️ Помилка під час перевірки (worker)"
+        if self.error == ERROR_TIMEOUT:
+            return f"⏱ <a href=\"{url}\">Сторінка</a> не відповіла вчасно — перевіримо пізніше"
+        if self.brand == "zara":
+            return self._render_zara(url)
+        return self._render_bershka(url)
+
+    def _render_zara(self, url: str) -> str:
+        if self.error == ERROR_OPEN_FAILED:
+            return (
+                f"<b>🧵 Zara</b>\n"
+                f"🔗 <a href=\"{url}\">Посилання на товар</a>\n"
+                f"⚠️ Помилка відкриття сторінки"
+            )
+
+        lines = ["<b>🧵 Zara</b>"]
+        if self.name:
+            lines.append(self.name)
+
+        if self.error == ERROR_NO_ADD_TO_CART:
+            lines.append(f"🔗 <a href=\"{url}\">Посилання на товар</a>")
+            lines.append("❌ Кнопку 'Додати у кошик' не знайдено — товар/розміри можуть бути недоступні.")
+            return "\n".join(lines)
+
+        lines.append(f"🔗 <a href=\"{url}\">{self.name}</a>")
+        if not self.sizes and not self.error:
+            lines.append("❌ Немає в наявності (розпродано)")
+            return "\n".join(lines)
+        lines.append("📏 Розміри:")
+        if self.error == ERROR_SIZES_NOT_FOUND:
+            lines.append("❗ Розміри не знайдені")
+        for label, state in self.sizes:
+            lines.append(f"{SIZE_MARKS[state]} {label}")
+        return "\n".join(lines)
+
+    def _render_bershka(self, url: str) -> str:
+        if self.error == ERROR_OPEN_FAILED:
+            return "⚠️ Помилка відкриття сторінки"
+
+        if self.sizes or not self.error:
+            if self.available_sizes:
+                general_status = "📦 Статус: Є в наявності"
+            else:
+                general_status = "📦 Статус: Немає в наявності"
+        else:
+            general_status = "📦 Статус: 😕 Не вдалося визначити наявність"
+
+        lines: List[str] = []
+        if self.name:
+            lines.append(f"🔗 <a href=\"{url}\">{self.name}</a>")
+        else:
+            lines.append(f"🔗 <a href=\"{url}\">Посилання на товар</a>")
+        lines.append(general_status)
+        lines.append("")
+
+        if self.sizes:
+            lines.append("📏 Розміри:")
+            for label, state in self.sizes:
+                # КЛЮЧОВИЙ формат: емодзі + пробіл + розмір
+                lines.append(f"{SIZE_MARKS[state]} {label}")
+        elif not self.error:
+            lines.append("📏 Розміри: розпродано")
+        else:
+            lines.append("📏 Розміри: (не знайдено)")
+        return "\n".join(lines)
+
+
+def status_from_db(
+    status_data: Optional[str],
+    last_status: Optional[str],
+    brand: Optional[str],
+) -> Optional[ProductStatus]:
+    """
+    ProductStatus з рядка БД: status_data (JSON), а для старих рядків — HTML-текст last_status.
+    None — товар ще жодного разу не перевіряли.
+    """
+    if status_data:
+        try:
+            return ProductStatus.from_json(status_data)
+        except (ValueError, TypeError):
+            pass
+    if last_status:
+        return ProductStatus.from_legacy_text(last_status, brand)
+    return None
+
+
+def unsupported_status() -> ProductStatus:
+    return ProductStatus(brand=None, error=ERROR_UNSUPPORTED)
+
+
+def worker_error_status(brand: Optional[str]) -> ProductStatus:
+    return ProductStatus(brand=brand, error=ERROR_WORKER)
+
+
+def timeout_status(brand: Optional[str]) -> ProductStatus:
+    return ProductStatus(brand=brand, error=ERROR_TIMEOUT)
@@ -0,0 +1,163 @@
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (назва, тип, вираз): тип — "css", "xpath" або "js" (JS-вираз, що повертає truthy)
+Condition = Tuple[str, str, str]
+
+POLL_INTERVAL = 0.15  # сек між перевірками умов
+
+# Один round-trip до браузера перевіряє всі умови одразу і повертає індекс першої виконаної.
+# JS-вирази вшиваються в текст скрипта, а не виконуються через eval / new Function:
+# CSP сторінки без 'unsafe-eval' таке блокує, а execute_script — ні.
+_ANY_OF_JS = """
+const checks = [
+%s
+];
+for (let i = 0; i < checks.length; i++) {
+    try {
+        if (checks[i]()) return i;
+    } catch (e) {}
+}
+return -1;
+"""
+
+_CHECK_JS = {
+    "css": "() => document.querySelector(%s) !== null",
+    "xpath": (
+        "() => document.evaluate(%s, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)"
+        ".singleNodeValue !== null"
+    ),
+    "js": "() => Boolean(%s)",
+}
+
+DOCUMENT_COMPLETE: Condition = ("document_complete", "js", "document.readyState === 'complete'")
+
+# Мітка на старій сторінці перед переходом: поки вона є — ми ще в попередньому документі
+_MARK_PREVIOUS_JS = "window.__previousPage = true;"
+NEW_DOCUMENT: Condition = ("new_document", "js", "!window.__previousPage")
+
+
+def css(name: str, selector: str) -> Condition:
+    return name, "css", selector
+
+
+def xpath(name: str, expr: str) -> Condition:
+    return name, "xpath", expr
+
+
+def js(name: str, expr: str) -> Condition:
+    return name, "js", expr
+
+
+@lru_cache(maxsize=64)
+def _any_of_script(conditions: Tuple[Condition, ...]) -> str:
+    checks = []
+    for _, kind, expr in conditions:
+        # css / xpath — як JSON-рядок, js — як є (це і є вираз)
+        checks.append("    " + _CHECK_JS[kind] % (f"({expr})" if kind == "js" else json.dumps(expr)))
+    return _ANY_OF_JS % ",\n".join(checks)
+
+
+def first_present(driver, conditions: Sequence[Condition]) -> Optional[str]:
+    """
+    Миттєва перевірка без очікування: назва першої виконаної умови або None.
+    """
+    try:
+        idx = driver.execute_script(_any_of_script(tuple(conditions)))
+    except Exception as e:
+        logger.debug("readiness check failed: %s", e)
+        return None
+    if isinstance(idx, int) and 0 <= idx < len(conditions):
+        return conditions[idx][0]
+    return None
+
+
+def wait_any(driver, conditions: Sequence[Condition], timeout: float) -> Optional[str]:
+    """
+    Чекає, поки виконається ХОЧА Б ОДНА з умов (список розмірів, «розпродано»,
+    сторінка помилки, банер...) і одразу повертає її назву.
+    None — якщо за timeout не виконалась жодна.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        name = first_present(driver, conditions)
+        if name is not None:
+            return name
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_INTERVAL)
+
+
+def navigate(driver, url: str, timeout: float = 15) -> bool:
+    """
+    driver.get(url) для будь-якої page load strategy.
+    З eager / none get повертається раніше, ніж сторінка повністю завантажиться, а з none —
+    навіть до того, як новий документ замінив старий: умови готовності тоді спрацювали б
+    на попередньому товарі. Тому чекаємо, поки зникне мітка попередньої сторінки.
+    False — новий документ так і не зʼявився за timeout.
+    """
+    try:
+        driver.execute_script(_MARK_PREVIOUS_JS)
+    except Exception:
+        pass
+    driver.get(url)
+    return wait_any(driver, [NEW_DOCUMENT], timeout) is not None
+
+
+def stop_loading(driver):
+    """
+    window.stop(): дані вже прочитані — решту сторінки (скрипти, lazy-контент) не довантажуємо.
+    """
+    try:
+        driver.execute_script("window.stop();")
+    except Exception as e:
+        logger.debug("window.stop failed: %s", e)
+
+
+class ReadinessReport:
+    """
+    Облік очікувань для однієї сторінки: скільки реально чекали
+    vs скільки забрали б старі фіксовані time.sleep / WebDriverWait (legacy).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.waited = 0.0
+        self.legacy = 0.0
+        self.events: List[str] = []
+
+    def wait(
+        self,
+        driver,
+        conditions: Sequence[Condition],
+        timeout: float,
+        legacy: float,
+    ) -> Optional[str]:
+        started = time.monotonic()
+        name = wait_any(driver, conditions, timeout)
+        self.waited += time.monotonic() - started
+        self.legacy += legacy
+        self.events.append(name or "timeout")
+        return name
+
+    def skip(self, legacy: float, event: str):
+        """
+        Старий код тут чекав би legacy секунд, а ми знаємо, що чекати нема на що.
+        """
+        self.legacy += legacy
+        self.events.append(event)
+
+    @property
+    def saved(self) -> float:
+        return max(0.0, self.legacy - self.waited)
+
+    def log(self):
+        logger.info(
+            "READY url=%s waited=%.2fs legacy=%.1fs saved=%.1fs events=%s",
+            self.url, self.waited, self.legacy, self.saved, ",".join(self.events),
+        )
@@ -0,0 +1,42 @@
+import logging
+from typing import List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from config import BLOCKED_RESOURCE_PATTERNS, BRAND_RESOURCE_RULES
+
+logger = logging.getLogger(__name__)
+
+
+def blocked_patterns(brand: Optional[str]) -> List[str]:
+    """
+    Список wildcard-патернів URL, які блокуємо для сторінок бренду:
+    загальний BLOCKED_RESOURCE_PATTERNS + deny бренду, мінус allow бренду.
+    """
+    rules = BRAND_RESOURCE_RULES.get(brand or "", {})
+    allow = set(rules.get("allow") or [])
+    patterns = [p for p in BLOCKED_RESOURCE_PATTERNS if p not in allow]
+    patterns.extend(p for p in rules.get("deny") or [] if p not in allow)
+    return patterns
+
+
+def apply_resource_filter(driver, brand: Optional[str]) -> bool:
+    """
+    Вмикає в браузері блокування ресурсів для бренду (CDP Network.setBlockedURLs).
+    Діє на всі наступні запити цього driver'а, поки не викличуть знову з іншим брендом.
+    False — якщо CDP недоступний (тоді сторінка просто вантажиться повністю).
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns(brand)})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        logger.warning("Resource filter not applied (brand=%s): %s", brand, e)
+        return False
+
+
+def clear_resource_filter(driver):
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    except (WebDriverException, AttributeError) as e:
+        logger.warning("Resource filter not cleared: %s", e)
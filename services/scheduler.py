@@ -0,0 +1,43 @@
+import random
+from typing import Optional
+
+from config import (
+    MONITOR_MIN_INTERVAL,
+    MONITOR_MAX_INTERVAL,
+    MONITOR_BACKOFF,
+    MONITOR_JITTER,
+)
+
+
+def next_interval(
+    prev_interval: Optional[float],
+    base_interval: float,
+    changed: bool,
+    low_stock: bool,
+    failed: bool = False,
+) -> float:
+    """
+    Адаптивний інтервал до наступної перевірки товару (сек).
+
+    - наявність змінилась або є 🟡 (мало залишилось) → найчастіше (MONITOR_MIN_INTERVAL)
+    - нічого не змінилось → інтервал росте в MONITOR_BACKOFF разів до MONITOR_MAX_INTERVAL
+    - сторінку не отримали (open_failed / worker / timeout) → інтервал не чіпаємо
+      (спробуємо ще раз з тим самим темпом); стабільне «розпродано» — звичайний результат,
+      для нього інтервал росте, як для будь-якого незмінного стану
+
+    Результат завжди в межах [MONITOR_MIN_INTERVAL, MONITOR_MAX_INTERVAL]
+    і з невеликим jitter, щоб товари не збивались в одну хвилю.
+    """
+    interval = prev_interval or base_interval
+
+    if failed:
+        pass
+    elif changed or low_stock:
+        interval = MONITOR_MIN_INTERVAL
+    else:
+        interval = interval * MONITOR_BACKOFF
+
+    # jitter спершу, межі — на фінальне значення (інакше на краях вилазить за них на ±MONITOR_JITTER)
+    jitter = interval * MONITOR_JITTER
+    interval += random.uniform(-jitter, jitter)
+    return min(MONITOR_MAX_INTERVAL, max(MONITOR_MIN_INTERVAL, interval))
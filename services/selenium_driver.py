@@ -2,6 +2,7 @@ import time
 import logging
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
+from services.readiness import DOCUMENT_COMPLETE, wait_any
 from services.user_agents import get_random_ua
 from selenium import webdriver
 logger = logging.getLogger(__name__)
@@ -36,7 +37,7 @@ def safe_get(driver: webdriver.Chrome, url: str, retries: int = 3, timeout: int
         try:
             driver.set_page_load_timeout(timeout)
             driver.get(url)
-            time.sleep(3)
+            wait_any(driver, [DOCUMENT_COMPLETE], timeout=3)
             return True
         except (TimeoutException, WebDriverException) as e:
             logger.warning(f"[safe_get] attempt {attempt}/{retries} failed for {url}: {e}")
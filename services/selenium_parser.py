@@ -1,47 +1,60 @@
 import logging
 import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from math import ceil
-from typing import Dict, List, Tuple, Callable, Optional
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Callable, Optional, Union
 from selenium import webdriver
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
-from config import MAX_PER_BRAND, USER_AGENTS
+from config import (
+    MAX_PER_BRAND,
+    USER_AGENTS,
+    DRIVER_POOL_SIZE,
+    DRIVER_MAX_PAGES,
+    SELENIUM_URL_DEADLINE,
+    RESOURCE_BLOCKING_ENABLED,
+    PAGE_LOAD_STRATEGY,
+    CHROME_PROFILE_DIR,
+    CHROME_PROFILE_TEMPLATE,
+    DRIVER_PREWARM,
+    PREWARM_ORIGINS,
+    SELENIUM_TABS_PER_BROWSER,
+)
 from services.bershka_parser import check_bershka_one
+from services.chrome_profile import ProfileSlots, prewarm
+from services.consent import preseed_cookies
+from services.driver_pool import DriverPool, PooledDriver
+from services.product_status import ProductStatus, timeout_status, unsupported_status, worker_error_status
+from services.resource_filter import apply_resource_filter
+from services.tab_pool import TabPool
 from services.zara_parser import check_zara
+from utils.text import chunk_lines
 from utils.urls import detect_brand
 
 logger = logging.getLogger(__name__)
 
 
-def safe_get(driver, url: str, retries: int = 3, timeout: int = 15):
+def create_driver(
+        headless: bool = False,
+        perf_log: bool = False,
+        page_load_strategy: str = "normal",
+        preseed: bool = False,
+        profile_dir: Optional[str] = None,
+        background_tabs: bool = False,
+) -> webdriver.Chrome:
     """
-    Безпечний load сторінки:
-    + повторяє відкриття якщо щось пішло не так
-    + не дає скрипту впасти
+    perf_log — вмикає performance-лог Chrome (мережеві події CDP), потрібен для бенчмарків.
+    page_load_strategy — normal / eager / none (див. PAGE_LOAD_STRATEGY).
+    preseed — одразу покласти кукі згоди OneTrust і вибору магазину (services/consent.py).
+    profile_dir — постійний user-data-dir (з HTTP-кешем); None — тимчасовий чистий профіль.
+    background_tabs — не пригальмовувати фонові вкладки (режим вкладок, services/tab_pool.py).
     """
-
-    for attempt in range(1, retries + 1):
-        try:
-            driver.set_page_load_timeout(timeout)
-            driver.get(url)
-            time.sleep(3)  # Zara рендерить React → треба дати час
-            return True
-
-        except (TimeoutException, WebDriverException) as e:
-            print(f"[safe_get] ERROR attempt {attempt}/{retries}: {e}")
-            if attempt == retries:
-                return False
-
-            # пауза перед повтором
-            time.sleep(2)
-
-    return False
-
-
-def create_driver(headless: bool = False) -> webdriver.Chrome:
     chrome_options = Options()
+    chrome_options.page_load_strategy = page_load_strategy
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
 
     if headless:
         chrome_options.add_argument("--headless=new")
@@ -60,57 +73,178 @@ def create_driver(headless: bool = False) -> webdriver.Chrome:
 
     chrome_options.add_argument("--window-size=1920,1080")
 
+    if background_tabs:
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+
+    if perf_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
     #chrome_options.binary_location = "/usr/bin/chromium-browser"
     driver = webdriver.Chrome(options=chrome_options)
+    if preseed:
+        preseed_cookies(driver)
 
     return driver
 
 
-def _worker_chunk(urls_chunk: List[str], on_result=None) -> List[Tuple[str, str]]:
+_driver_pool: Optional[Union[DriverPool, TabPool]] = None
+_driver_pool_lock = threading.Lock()
+
+
+def pool_page_load_strategy() -> str:
+    return "none" if SELENIUM_TABS_PER_BROWSER > 1 else PAGE_LOAD_STRATEGY
+
+
+def _create_pool_driver(slots: Optional[ProfileSlots]) -> webdriver.Chrome:
     """
-    Один worker: створює свій driver, проходить по виданих urls, повертає [(url, status), ...]
+    Браузер для пулу: свій слот профілю (якщо CHROME_PROFILE_DIR задано) + прогрів брендів.
     """
-    if not urls_chunk:
-        return []
-
-    driver = None
-    results: List[Tuple[str, str]] = []
+    profile_dir = slots.acquire() if slots else None
     try:
-        driver = create_driver(headless=True)
-
-        for url in urls_chunk:
-            brand = detect_brand(url)
-            if brand == "zara":
-                status = check_zara(driver, url)
-            elif brand == "bershka":
-                status = check_bershka_one(driver, url)
+        driver = create_driver(
+            headless=True,
+            page_load_strategy=pool_page_load_strategy(),
+            preseed=True,
+            profile_dir=profile_dir,
+            background_tabs=SELENIUM_TABS_PER_BROWSER > 1,
+        )
+    except BaseException:
+        if slots:
+            slots.release(profile_dir)
+        raise
+
+    driver.profile_dir = profile_dir
+    if DRIVER_PREWARM:
+        started = time.monotonic()
+        prewarm(driver, PREWARM_ORIGINS)
+        logger.info("Driver prewarmed in %.1fs (profile=%s)", time.monotonic() - started, profile_dir)
+    return driver
+
+
+def get_driver_pool() -> Union[DriverPool, TabPool]:
+    """
+    Спільний пул драйверів для моніторингу і для handle_links.
+    Браузери живуть між циклами monitor_loop, а не створюються на кожен чанк.
+    SELENIUM_TABS_PER_BROWSER > 1 — пул вкладок (кілька сторінок в одному Chrome).
+    """
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            slots = ProfileSlots(CHROME_PROFILE_DIR, CHROME_PROFILE_TEMPLATE) if CHROME_PROFILE_DIR else None
+            dispose = (lambda driver: slots.release(getattr(driver, "profile_dir", None))) if slots else None
+            if SELENIUM_TABS_PER_BROWSER > 1:
+                _driver_pool = TabPool(
+                    factory=lambda: _create_pool_driver(slots),
+                    max_browsers=DRIVER_POOL_SIZE,
+                    tabs=SELENIUM_TABS_PER_BROWSER,
+                    max_pages=DRIVER_MAX_PAGES,
+                    dispose=dispose,
+                )
             else:
-                status = "❗ Непідтримуваний домен (не Zara/Bershka)"
+                _driver_pool = DriverPool(
+                    factory=lambda: _create_pool_driver(slots),
+                    max_size=DRIVER_POOL_SIZE,
+                    max_pages=DRIVER_MAX_PAGES,
+                    dispose=dispose,
+                )
+        return _driver_pool
 
-            if on_result:
-                on_result(url, status)
 
-    except Exception as e:
-        logger.exception("Error in worker chunk: %s", e)
-        # у випадку фатальної помилки — позначимо всі як помилка
-        if not results:
-            # якщо ще нічого не встигли записати
-            results = [(url, "⚠️ Помилка під час перевірки (worker)") for url in urls_chunk]
-    finally:
-        if driver is not None:
-            driver.quit()
+def close_driver_pool():
+    global _driver_pool
+    with _driver_pool_lock:
+        pool, _driver_pool = _driver_pool, None
+    if pool is not None:
+        pool.close()
 
-    return results
+
+def _check_one(driver, url: str, state: Optional[Dict] = None) -> ProductStatus:
+    """
+    state — PooledDriver.state цього браузера (парсери памʼятають там, що вже зроблено).
+    """
+    brand = detect_brand(url)
+    if brand == "zara":
+        return check_zara(driver, url, state)
+    if brand == "bershka":
+        return check_bershka_one(driver, url)
+    return unsupported_status()
+
+
+def _prepare_driver(item: PooledDriver, brand: Optional[str]):
+    """
+    Налаштування браузера під бренд перед сторінкою.
+    Що вже ввімкнено — пам'ятаємо в item.state, щоб не слати CDP-команди на кожен URL.
+    """
+    if RESOURCE_BLOCKING_ENABLED and item.state.get("resource_filter") != brand:
+        if apply_resource_filter(item.driver, brand):
+            item.state["resource_filter"] = brand
+
+
+def url_worker(
+        next_url: Callable[[], Optional[str]],
+        on_result: Callable[[str, ProductStatus], None],
+        on_start: Optional[Callable[[str], None]] = None,
+):
+    """
+    Довгоживучий worker: бере URL по одному через next_url(), поки той не поверне None.
+    На кожен URL бере driver з пулу і одразу повертає його — так worker, що чекає
+    на роботу, не тримає браузер, потрібний іншим (handle_links, інші worker'и).
+    on_start(url) — driver уже отримано, сторінка починає вантажитись
+    (очікування вільного driver'а в пулі сюди не входить).
+    Результат кожного URL віддає в on_result(url, status).
+    """
+    pool = get_driver_pool()
+    while True:
+        url = next_url()
+        if url is None:
+            break
+
+        queued = time.monotonic()
+        try:
+            with pool.lease() as item:
+                started = time.monotonic()
+                if on_start is not None:
+                    on_start(url)
+                _prepare_driver(item, detect_brand(url))
+                status = _check_one(item.driver, url, item.state)
+                item.mark_page()
+            logger.info(
+                "TTR url=%s ttr=%.2fs lease_wait=%.2fs strategy=%s sizes=%s error=%s",
+                url, time.monotonic() - started, started - queued, pool_page_load_strategy(),
+                len(status.sizes), status.error,
+            )
+        except WebDriverException as e:
+            logger.warning("Driver error on %s, recycling driver: %s", url, e)
+            status = worker_error_status(detect_brand(url))
+        except Exception as e:
+            logger.exception("Error while checking %s: %s", url, e)
+            status = worker_error_status(detect_brand(url))
+
+        try:
+            on_result(url, status)
+        except Exception:
+            logger.exception("on_result callback failed for url=%s", url)
 
 
 def check_many_products_selenium_parallel(
         urls: List[str],
         max_workers: int = 4,
         on_result=None,
-) -> Dict[str, List[Tuple[str, str]]]:
+        max_per_brand: Optional[int] = MAX_PER_BRAND,
+        prefetched: Optional[Dict[str, ProductStatus]] = None,
+        url_deadline: float = SELENIUM_URL_DEADLINE,
+) -> Dict[str, List[Tuple[str, ProductStatus]]]:
     """
     Паралельна перевірка через кілька driver'ів.
     max_workers = скільки максимум одночасних браузерів відкривати.
+    Worker'и беруть URL по одному зі спільної черги (work-stealing), тож одна повільна
+    сторінка не тримає за собою цілий чанк, поки інші worker'и простоюють.
+    url_deadline = скільки секунд чекаємо на сторінку після того, як worker отримав для неї driver;
+    не вклалась — у результатах timeout_status, а пізній результат ігнорується.
+    max_per_brand = ліміт URL на бренд (None — без ліміту, для моніторингу).
+    prefetched = {url: status}, вже отримані швидким HTTP-шляхом — їх Selenium не відкриває.
 
     Якщо переданий on_result(url, status) — буде викликатись одразу після парсингу кожного url.
 
@@ -130,71 +264,116 @@ def check_many_products_selenium_parallel(
     for u in urls:
         brand = detect_brand(u)
         if brand == "zara":
-            if len(zara_urls) < MAX_PER_BRAND:
+            if max_per_brand is None or len(zara_urls) < max_per_brand:
                 zara_urls.append(u)
         elif brand == "bershka":
-            if len(bershka_urls) < MAX_PER_BRAND:
+            if max_per_brand is None or len(bershka_urls) < max_per_brand:
                 bershka_urls.append(u)
         else:
             other_urls.append(u)
 
-    # Це ті, що реально будемо ходити Selenium-ом
-    to_check: List[str] = zara_urls + bershka_urls
+    prefetched = prefetched or {}
 
-    if not to_check and not other_urls:
-        return {"zara": [], "bershka": [], "other": []}
+    # Це ті, що реально будемо ходити Selenium-ом (без уже отриманих через HTTP)
+    to_check: List[str] = list(dict.fromkeys(u for u in zara_urls + bershka_urls if u not in prefetched))
+    fast_urls: List[str] = [u for u in zara_urls + bershka_urls if u in prefetched]
 
-    # Розрахуємо кількість воркерів адекватно до кількості URL
-    workers = min(max_workers, max(1, len(to_check)))
+    if not to_check and not fast_urls and not other_urls:
+        return {"zara": [], "bershka": [], "other": []}
 
-    # Розбиваємо на чанки
-    chunk_size = ceil(len(to_check) / workers)
-    chunks: List[List[str]] = [
-        to_check[i: i + chunk_size] for i in range(0, len(to_check), chunk_size)
-    ]
+    # Розрахуємо кількість воркерів адекватно до кількості URL (і до розміру пулу)
+    workers = min(max_workers, get_driver_pool().max_size, max(1, len(to_check)))
 
-    logger.info(
-        "Running selenium in parallel: %s urls, %s workers, chunk_size=%s",
-        len(to_check), workers, chunk_size
-    )
+    logger.info("Running selenium in parallel: %s urls, %s workers", len(to_check), workers)
 
-    results: Dict[str, List[Tuple[str, str]]] = {
+    results: Dict[str, List[Tuple[str, ProductStatus]]] = {
         "zara": [],
         "bershka": [],
         "other": [],
     }
 
-    # Спочатку додамо "other" як не підтримувані (без Selenium)
-    for u in other_urls:
-        status = "❗ Непідтримуваний домен (не Zara/Bershka)"
-        results["other"].append((u, status))
+    # Спочатку додамо "other" як не підтримувані (без Selenium) і готові з HTTP
+    for u in other_urls + fast_urls:
+        if u in prefetched:
+            status = prefetched[u]
+            results[detect_brand(u)].append((u, status))
+        else:
+            status = unsupported_status()
+            results["other"].append((u, status))
         if on_result:
             try:
                 on_result(u, status)
             except Exception:
                 logger.exception("on_result callback failed for url=%s", u)
 
-    # Запускаємо потоки з окремими драйверами
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        future_to_chunk = {
-            executor.submit(_worker_chunk, chunk, on_result): chunk for chunk in chunks
-        }
-
-        for future in as_completed(future_to_chunk):
-            chunk_result = future.result()
-            for url, status in chunk_result:
-                brand = detect_brand(url)
-                if brand == "zara":
-                    results["zara"].append((url, status))
-                elif brand == "bershka":
-                    results["bershka"].append((url, status))
-                else:
-                    results["other"].append((url, status))
+    def record(url: str, status: ProductStatus):
+        results[detect_brand(url) or "other"].append((url, status))
+        if on_result:
+            try:
+                on_result(url, status)
+            except Exception:
+                logger.exception("on_result callback failed for url=%s", url)
+
+    # Спільна черга URL: кожен worker бере наступний, щойно звільнився
+    tasks: "queue.Queue[Optional[str]]" = queue.Queue()
+    for u in to_check:
+        tasks.put(u)
+    for _ in range(workers):
+        tasks.put(None)
+
+    done: "queue.Queue[Tuple[str, ProductStatus]]" = queue.Queue()
+    started: Dict[str, float] = {}
+    started_lock = threading.Lock()
+
+    def next_url() -> Optional[str]:
+        return tasks.get()
+
+    def mark_started(url: str):
+        # дедлайн рахуємо від моменту, коли є driver: поки worker чекає вільний браузер
+        # у пулі (моніторинг тримає більшість), сторінка ще й не почала вантажитись
+        with started_lock:
+            started[url] = time.monotonic()
+
+    def collect(url: str, status: ProductStatus):
+        done.put((url, status))
+
+    # Запускаємо потоки, кожен бере driver зі спільного пулу на кожен URL
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="selenium")
+    for _ in range(workers):
+        executor.submit(url_worker, next_url, collect, mark_started)
+
+    pending = set(to_check)
+    try:
+        while pending:
+            now = time.monotonic()
+            with started_lock:
+                deadlines = {u: started[u] + url_deadline for u in pending if u in started}
+
+            for url, deadline in deadlines.items():
+                if deadline <= now:
+                    logger.warning("URL deadline exceeded (%ss): %s", url_deadline, url)
+                    pending.discard(url)
+                    record(url, timeout_status(detect_brand(url)))
+            if not pending:
+                break
+
+            wait = min((d - now for d in deadlines.values() if d > now), default=url_deadline)
+            try:
+                url, status = done.get(timeout=max(0.05, wait))
+            except queue.Empty:
+                continue
+            if url in pending:
+                pending.discard(url)
+                record(url, status)
+    finally:
+        # worker'и, що застрягли на простроченій сторінці, доробляють у фоні —
+        # їхні результати вже нікому не потрібні
+        executor.shutdown(wait=False)
 
     return results
 
 
-def format_results(results: Dict[str, List[Tuple[str, str]]]) -> List[str]:
+def format_results(results: Dict[str, List[Tuple[str, ProductStatus]]]) -> List[str]:
     """
     results:
     {
@@ -203,46 +382,34 @@ def format_results(results: Dict[str, List[Tuple[str, str]]]) -> List[str]:
       "other":   [(url, status), ...]
     }
     """
-    blocks: List[str] = []
-    current = ""
-
-    def add_line(line: str):
-        nonlocal current, blocks
-        if len(current) + len(line) + 1 > 3500:
-            if current.strip():
-                blocks.append(current)
-            current = ""
-        current += line + "\n"
-
-    for brand_title, key in [
-        ("👗 Zara", "zara"),
-        ("🧥 Bershka", "bershka"),
-        ("Інше", "other"),
-    ]:
-        items = results.get(key) or []
-        if not items:
-            continue
 
-        # Можеш залишити заголовок бренду, або прибрати – як хочеш
-        add_line(f"<b>{brand_title}</b>\n")
+    def lines():
+        for brand_title, key in [
+            ("👗 Zara", "zara"),
+            ("🧥 Bershka", "bershka"),
+            ("Інше", "other"),
+        ]:
+            items = results.get(key) or []
+            if not items:
+                continue
 
-        for _, status in items:
-            # status вже містить красивий блок з лінком + розмірами
-            add_line(status)
-            add_line("")  # відступ між товарами
+            # Можеш залишити заголовок бренду, або прибрати – як хочеш
+            yield f"<b>{brand_title}</b>\n"
 
-        add_line("")  # відступ між брендами
+            for url, status in items:
+                # HTML рендеримо тільки тут — перед відправкою в чат
+                yield status.render_html(url)
+                yield ""  # відступ між товарами
 
-    if current.strip():
-        blocks.append(current)
+            yield ""  # відступ між брендами
 
-    return blocks
+    return chunk_lines(lines())
 
 
-def check_urls_for_user(urls: List[str]) -> Dict[str, str]:
+def check_urls_for_user(urls: List[str]) -> Dict[str, ProductStatus]:
     """
     Перевіряє список URL одного юзера.
-    Повертає dict {url: status_text}.
+    Повертає dict {url: ProductStatus}.
 
     Тепер всередині використовує паралельний Selenium
     (до 4 окремих драйверів через ThreadPoolExecutor).
@@ -253,7 +420,7 @@ def check_urls_for_user(urls: List[str]) -> Dict[str, str]:
         max_workers=4,   # 👈 4 драйвери одночасно
     )
 
-    status_map: Dict[str, str] = {}
+    status_map: Dict[str, ProductStatus] = {}
 
     # Розкладаємо результати по плоскому dict {url: status}
     for brand_key in ("zara", "bershka", "other"):
@@ -263,34 +430,6 @@ def check_urls_for_user(urls: List[str]) -> Dict[str, str]:
     # На всякий випадок — якщо якийсь URL не потрапив у результати
     for u in urls:
         if u not in status_map:
-            status_map[u] = "⚠️ Не вдалося перевірити URL"
+            status_map[u] = worker_error_status(detect_brand(u))
 
     return status_map
-
-
-
-def check_urls_for_user_parallel(
-    urls: List[str],
-    max_workers: int = 4,
-    on_result: Optional[Callable[[str, str], None]] = None,
-) -> Dict[str, str]:
-    """
-    Паралельна версія для моніторингу:
-    - всередині використовує check_many_products_selenium_parallel(...)
-    - повертає {url: status_text}
-    - якщо переданий on_result(url, status) — викликається одразу по мірі готовності кожного url
-    """
-    grouped = check_many_products_selenium_parallel(
-        urls=urls,
-        max_workers=max_workers,
-        on_result=on_result,   # ✅ прокидаємо callback далі
-    )
-
-    status_map: Dict[str, str] = {}
-
-    for _, items in grouped.items():
-        for url, status in items:
-            status_map[url] = status
-
-    return status_map
-
@@ -0,0 +1,62 @@
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from services.product_status import normalize_size
+
+
+class SizeCatalog:
+    """
+    Інтернований каталог розмірів по товарах: product_key → {розмір: номер біта}.
+
+    Наявність розмірів (і фільтр sizes підписки) зберігається як int-бітмаска:
+    порівняння «змінилось / чи є потрібний розмір» — це звичайні == і &,
+    а на підписку в памʼяті лишається одне число замість set[str] / статусу.
+    Розміри — ключі normalize_size, як ProductStatus.available_sizes.
+    """
+
+    def __init__(self):
+        self._bits: Dict[str, Dict[str, int]] = {}
+        self._labels: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def mask(self, key: str, labels: Iterable[str]) -> int:
+        """
+        Бітмаска розмірів товару. Нові розміри одразу реєструються в каталозі.
+        """
+        bits = self._bits.setdefault(key, {})
+        result = 0
+        for label in labels:
+            bit = bits.get(label)
+            if bit is None:
+                label = sys.intern(label)
+                bit = len(bits)
+                bits[label] = bit
+                self._labels.setdefault(key, []).append(label)
+            result |= 1 << bit
+        return result
+
+    def parse_filter(self, key: str, sizes_raw: Optional[str]) -> int:
+        """
+        Фільтр sizes підписки ("M,L,XL") → бітмаска. 0 — слідкуємо за всіма розмірами.
+        """
+        if not sizes_raw:
+            return 0
+        return self.mask(key, (normalize_size(s) for s in sizes_raw.split(",") if s.strip()))
+
+    def labels(self, key: str, mask: int) -> List[str]:
+        """
+        Бітмаска → відсортований список розмірів (для тексту повідомлення / логів).
+        """
+        known = self._labels.get(key) or []
+        return sorted(label for bit, label in enumerate(known) if mask >> bit & 1)
+
+    def retain(self, keys: Iterable[str]):
+        """
+        Прибирає каталоги товарів, за якими вже ніхто не слідкує.
+        """
+        keep = set(keys)
+        for key in [k for k in self._bits if k not in keep]:
+            del self._bits[key]
+            self._labels.pop(key, None)
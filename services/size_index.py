@@ -0,0 +1,108 @@
+from typing import Dict, Iterable, Mapping, Set, Tuple
+
+
+def iter_bits(mask: int) -> Iterable[int]:
+    """
+    Номери встановлених бітів маски (від молодшого).
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SizeIndex:
+    """
+    Інвертований індекс підписок: товар → біт розміру (SizeCatalog) → {sub_id, ...}.
+    Підписки без фільтра sizes (маска 0) лежать окремо — їх цікавить будь-який розмір.
+
+    match() повертає тих, хто чекає хоча б один з розмірів маски, за час
+    пропорційний кількості збігів, а не кількості підписок на товар.
+    Індекс оновлюється інкрементально: add / remove / sync з новим планом.
+    """
+
+    def __init__(self):
+        self._by_size: Dict[str, Dict[int, Set[int]]] = {}
+        self._any: Dict[str, Set[int]] = {}
+        self._subs: Dict[int, Tuple[str, int]] = {}  # sub_id → (product_key, маска фільтра)
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def wanted(self, sub_id: int) -> int:
+        """
+        Маска фільтра sizes підписки (0 — всі розміри).
+        """
+        entry = self._subs.get(sub_id)
+        return entry[1] if entry else 0
+
+    def add(self, sub_id: int, key: str, wanted_mask: int):
+        current = self._subs.get(sub_id)
+        if current == (key, wanted_mask):
+            return
+        if current is not None:
+            self.remove(sub_id)
+
+        self._subs[sub_id] = (key, wanted_mask)
+        if not wanted_mask:
+            self._any.setdefault(key, set()).add(sub_id)
+            return
+        sizes = self._by_size.setdefault(key, {})
+        for bit in iter_bits(wanted_mask):
+            sizes.setdefault(bit, set()).add(sub_id)
+
+    def remove(self, sub_id: int):
+        entry = self._subs.pop(sub_id, None)
+        if entry is None:
+            return
+        key, wanted_mask = entry
+
+        if not wanted_mask:
+            subs = self._any.get(key)
+            if subs is not None:
+                subs.discard(sub_id)
+                if not subs:
+                    del self._any[key]
+            return
+
+        sizes = self._by_size.get(key, {})
+        for bit in iter_bits(wanted_mask):
+            subs = sizes.get(bit)
+            if subs is None:
+                continue
+            subs.discard(sub_id)
+            if not subs:
+                del sizes[bit]
+        if not sizes:
+            self._by_size.pop(key, None)
+
+    def sync(self, plan: Mapping[int, Tuple[str, int]]) -> Tuple[int, int]:
+        """
+        Приводить індекс до плану {sub_id: (product_key, маска фільтра)}:
+        додає нові / змінені підписки і прибирає видалені. Повертає (додано, видалено).
+        """
+        removed = [sub_id for sub_id in self._subs if sub_id not in plan]
+        for sub_id in removed:
+            self.remove(sub_id)
+
+        added = 0
+        for sub_id, entry in plan.items():
+            if self._subs.get(sub_id) != entry:
+                self.add(sub_id, *entry)
+                added += 1
+        return added, len(removed)
+
+    def match(self, key: str, mask: int) -> Set[int]:
+        """
+        Підписки на товар key, яких цікавить хоча б один розмір з mask.
+        """
+        if not mask:
+            return set()
+        result = set(self._any.get(key, ()))
+        sizes = self._by_size.get(key)
+        if sizes:
+            for bit in iter_bits(mask):
+                subs = sizes.get(bit)
+                if subs:
+                    result |= subs
+        return result
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.remote.command import Command
+
+from services.driver_pool import PooledDriver
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserTabs:
+    """
+    Один Chrome з кількома вкладками, кожною з яких керує свій потік.
+
+    WebDriver-сесія у браузера одна, тому всі команди (і driver'а, і елементів, і CDP)
+    проходять через driver.execute під спільним локом, а перед командою ми перемикаємось
+    на вкладку, привʼязану до поточного потоку (bind). Команда займає мілісекунди,
+    а завантаження сторінки (pageLoadStrategy none) і паузи між опитуваннями умов
+    readiness відбуваються без локу — тож вкладки вантажаться і чекають паралельно.
+    """
+
+    def __init__(self, driver: webdriver.Chrome, tabs: int):
+        self.driver = driver
+        self.handles: List[str] = [driver.current_window_handle]
+        for _ in range(tabs - 1):
+            driver.switch_to.new_window("tab")
+            self.handles.append(driver.current_window_handle)
+
+        self.items: List["PooledTab"] = []
+        self.leased = 0
+        self.retiring = False
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._current: Optional[str] = driver.current_window_handle
+        self._execute = driver.execute
+        driver.execute = self._routed_execute
+
+    @property
+    def pages(self) -> int:
+        return sum(item.pages for item in self.items)
+
+    def bind(self, handle: Optional[str]):
+        """
+        Усі команди поточного потоку відтепер ідуть у вкладку handle (None — у поточну).
+        """
+        self._local.handle = handle
+
+    def _routed_execute(self, driver_command: str, params: Optional[dict] = None):
+        handle = getattr(self._local, "handle", None)
+        with self._lock:
+            if handle is not None and handle != self._current:
+                self._execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+                self._current = handle
+            result = self._execute(driver_command, params)
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                self._current = (params or {}).get("handle")
+            return result
+
+
+class PooledTab(PooledDriver):
+    """
+    Вкладка з TabPool. driver — спільний для всіх вкладок браузера,
+    state і лічильник сторінок — свої (фільтр ресурсів CDP теж діє на вкладку).
+    """
+
+    def __init__(self, browser: BrowserTabs, handle: str):
+        super().__init__(browser.driver)
+        self.browser = browser
+        self.handle = handle
+
+
+class TabPool:
+    """
+    Пул вкладок: той самий інтерфейс, що в DriverPool (acquire / release / lease / close / max_size),
+    але одиниця паралелізму — вкладка, а не окремий процес Chrome.
+
+    - max_browsers браузерів по tabs вкладок, браузер створюється, коли немає вільних вкладок
+    - браузер перезапускається цілком: після max_pages * tabs сторінок
+      або якщо будь-яку його вкладку позначили broken; закривається, коли повернули всі вкладки
+    - вкладка привʼязується до потоку, що її взяв (acquire і робота — в одному потоці)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], webdriver.Chrome],
+        max_browsers: int = 2,
+        tabs: int = 4,
+        max_pages: int = 100,
+        dispose: Optional[Callable[[webdriver.Chrome], None]] = None,
+    ):
+        self._factory = factory
+        self._max_browsers = max_browsers
+        self._tabs = tabs
+        self._max_pages = max_pages
+        self._dispose = dispose
+        self._cond = threading.Condition()
+        self._browsers: List[BrowserTabs] = []
+        self._idle: List[PooledTab] = []
+        self._creating = 0
+        self._closed = False
+
+    @property
+    def max_size(self) -> int:
+        return self._max_browsers * self._tabs
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledTab:
+        """
+        Видає вільну вкладку (або відкриває новий браузер, якщо ліміт дозволяє).
+        Блокується, поки вкладка не звільниться (або до timeout → TimeoutError).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self._take(deadline)
+            item.browser.bind(item.handle)
+            if self._is_healthy(item):
+                return item
+
+            logger.warning("TabPool: tab failed health-check, recycling browser")
+            item.mark_broken()
+            self.release(item)
+
+    def _take(self, deadline: Optional[float]) -> PooledTab:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("TabPool is closed")
+                if self._idle:
+                    item = self._idle.pop()
+                    item.browser.leased += 1
+                    return item
+                if len(self._browsers) + self._creating < self._max_browsers:
+                    self._creating += 1
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("TabPool: no free tab")
+                self._cond.wait(remaining)
+
+        logger.info("TabPool: creating new browser with %s tabs", self._tabs)
+        try:
+            browser = BrowserTabs(self._factory(), self._tabs)
+        except BaseException:
+            with self._cond:
+                self._creating -= 1
+                self._cond.notify_all()
+            raise
+
+        browser.items = [PooledTab(browser, handle) for handle in browser.handles]
+        with self._cond:
+            self._creating -= 1
+            self._browsers.append(browser)
+            item, rest = browser.items[0], browser.items[1:]
+            browser.leased += 1
+            self._idle.extend(rest)
+            self._cond.notify_all()
+        return item
+
+    def release(self, item: PooledTab):
+        """
+        Повертає вкладку в пул. Якщо браузер на виході — закриваємо його,
+        щойно повернули останню видану вкладку.
+        """
+        browser = item.browser
+        browser.bind(None)
+
+        with self._cond:
+            browser.leased -= 1
+            if item.broken or self._closed or browser.pages >= self._max_pages * self._tabs:
+                if not browser.retiring:
+                    logger.info(
+                        "TabPool: recycling browser (broken=%s, pages=%s)",
+                        item.broken, browser.pages,
+                    )
+                browser.retiring = True
+
+            finished = False
+            if browser.retiring:
+                self._idle = [t for t in self._idle if t.browser is not browser]
+                if browser.leased == 0 and browser in self._browsers:
+                    self._browsers.remove(browser)
+                    finished = True
+            else:
+                self._idle.append(item)
+            self._cond.notify_all()
+
+        if finished:
+            self._quit(browser)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """
+        with pool.lease() as item:
+            item.driver.get(...)
+        Якщо всередині вилетів виняток — браузер вкладки вважаємо зламаним.
+        """
+        item = self.acquire(timeout=timeout)
+        try:
+            yield item
+        except BaseException:
+            item.mark_broken()
+            raise
+        finally:
+            self.release(item)
+
+    def close(self):
+        """
+        Закриває браузери, в яких жодна вкладка не видана. Решта закриються при release().
+        """
+        with self._cond:
+            self._closed = True
+            self._idle = []
+            idle = [b for b in self._browsers if b.leased == 0]
+            for browser in self._browsers:
+                browser.retiring = True
+            self._browsers = [b for b in self._browsers if b.leased]
+            self._cond.notify_all()
+        for browser in idle:
+            self._quit(browser)
+
+    @staticmethod
+    def _is_healthy(item: PooledTab) -> bool:
+        try:
+            item.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, browser: BrowserTabs):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning("TabPool: error on driver.quit(): %s", e)
+        if self._dispose is not None:
+            try:
+                self._dispose(browser.driver)
+            except Exception as e:
+                logger.warning("TabPool: error on dispose: %s", e)
@@ -0,0 +1,277 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+from config import (
+    TG_CHAT_RATE,
+    TG_GLOBAL_RATE,
+    TG_GROUP_RATE_PER_MIN,
+    TG_SEND_MAX_RETRIES,
+    TG_SEND_QUEUE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Класичний token bucket: rate токенів за секунду, не більше capacity в запасі.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Скільки секунд чекати до наступного токена (0 — можна вже).
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Outgoing:
+    __slots__ = ("text", "kwargs", "attempts", "done")
+
+    def __init__(self, text: str, kwargs: Dict[str, Any], done: asyncio.Future):
+        self.text = text
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.done = done
+
+
+class SendScheduler:
+    """
+    Центральна черга відправки повідомлень з урахуванням лімітів Telegram:
+    - глобально: global_rate повідомлень/сек
+    - в один чат: chat_rate повідомлень/сек
+    - в групу (chat_id < 0): додатково group_rate_per_min повідомлень/хв
+
+    Повідомлення одного чату йдуть строго по черзі (одне в дорозі на чат).
+    TelegramRetryAfter → чат ставиться на паузу на retry_after і повідомлення
+    повторюється першим; мережеві / 5xx помилки — до max_retries спроб з backoff.
+
+    Backpressure: send() чекає, якщо в черзі вже max_pending повідомлень,
+    тож продюсер (моніторинг) сам пригальмовує під швидкість Telegram.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = TG_GLOBAL_RATE,
+        chat_rate: float = TG_CHAT_RATE,
+        group_rate_per_min: float = TG_GROUP_RATE_PER_MIN,
+        max_pending: int = TG_SEND_QUEUE_SIZE,
+        max_retries: int = TG_SEND_MAX_RETRIES,
+    ):
+        self._bot = bot
+        self._chat_rate = chat_rate
+        self._group_rate = group_rate_per_min / 60
+        self._max_retries = max_retries
+
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._group_buckets: Dict[int, TokenBucket] = {}
+
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._pending: Dict[int, Deque[_Outgoing]] = {}
+        self._heap: List[Tuple[float, int, int]] = []  # (ready_at, seq, chat_id)
+        self._seq = 0
+        self._inflight: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.retry_after = 0
+
+    # ---------- API ----------
+
+    def start(self):
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        """
+        Ставить повідомлення в чергу (чекає, якщо черга повна).
+        Повертає future: True — доставлено, False — відкинуто після помилок.
+        """
+        await self._capacity.acquire()
+        done = asyncio.get_running_loop().create_future()
+        queue = self._pending.get(chat_id)
+        if queue is None:
+            queue = self._pending[chat_id] = deque()
+        queue.append(_Outgoing(text, kwargs, done))
+        if len(queue) == 1 and chat_id not in self._inflight:
+            self._push(chat_id, time.monotonic())
+        return done
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._pending.values())
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "chats": len(self._pending),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "retry_after": self.retry_after,
+        }
+
+    async def close(self, timeout: float = 10):
+        """
+        Дає черзі дослатись (до timeout сек), потім зупиняє диспетчер.
+        """
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._tasks) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    # ---------- диспетчер ----------
+
+    def _push(self, chat_id: int, ready_at: float):
+        self._seq += 1
+        heapq.heappush(self._heap, (ready_at, self._seq, chat_id))
+        self._wake.set()
+
+    async def _sleep_or_wake(self, timeout: Optional[float]):
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                self._prune()
+                await self._sleep_or_wake(None)
+                continue
+
+            now = time.monotonic()
+            ready_at, _, chat_id = self._heap[0]
+            wait = max(ready_at - now, self._global.delay(now))
+            if wait > 0:
+                await self._sleep_or_wake(wait)
+                continue
+
+            heapq.heappop(self._heap)
+            chat_wait = self._chat_delay(chat_id, now)
+            if chat_wait > 0:
+                self._push(chat_id, now + chat_wait)
+                continue
+
+            self._global.consume(now)
+            self._consume_chat(chat_id, now)
+            self._inflight.add(chat_id)
+            item = self._pending[chat_id].popleft()
+            task = asyncio.create_task(self._deliver(chat_id, item))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _chat_delay(self, chat_id: int, now: float) -> float:
+        delay = self._chat_bucket(chat_id).delay(now)
+        if chat_id < 0:
+            delay = max(delay, self._group_bucket(chat_id).delay(now))
+        return delay
+
+    def _consume_chat(self, chat_id: int, now: float):
+        self._chat_bucket(chat_id).consume(now)
+        if chat_id < 0:
+            self._group_bucket(chat_id).consume(now)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self._chat_rate, 1)
+        return bucket
+
+    def _group_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._group_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._group_buckets[chat_id] = TokenBucket(self._group_rate, self._group_rate * 60)
+        return bucket
+
+    async def _deliver(self, chat_id: int, item: _Outgoing):
+        ready_at = time.monotonic()
+        finished = True
+        try:
+            await self._bot.send_message(chat_id=chat_id, text=item.text, **item.kwargs)
+            self.sent += 1
+            item.done.set_result(True)
+        except TelegramRetryAfter as e:
+            self.retry_after += 1
+            logger.warning("SEND RetryAfter chat=%s retry_after=%ss", chat_id, e.retry_after)
+            ready_at = time.monotonic() + e.retry_after
+            finished = False
+        except (TelegramNetworkError, TelegramServerError) as e:
+            item.attempts += 1
+            if item.attempts <= self._max_retries:
+                self.retries += 1
+                logger.warning("SEND retry %s chat=%s err=%s", item.attempts, chat_id, e)
+                ready_at = time.monotonic() + 2 ** item.attempts
+                finished = False
+            else:
+                self._drop(chat_id, item, e)
+        except Exception as e:
+            self._drop(chat_id, item, e)
+        finally:
+            self._inflight.discard(chat_id)
+            queue = self._pending.get(chat_id)
+            if not finished:
+                queue.appendleft(item)
+            else:
+                self._capacity.release()
+            if queue:
+                self._push(chat_id, ready_at)
+            else:
+                self._pending.pop(chat_id, None)
+
+    def _drop(self, chat_id: int, item: _Outgoing, error: Exception):
+        self.failed += 1
+        logger.error("SEND FAIL chat=%s attempts=%s err=%s", chat_id, item.attempts, error)
+        item.done.set_result(False)
+
+    def _prune(self):
+        """
+        Прибирає bucket'и чатів, яким нічого слати і які вже «відпочили» (повний bucket).
+        """
+        now = time.monotonic()
+        for buckets in (self._chat_buckets, self._group_buckets):
+            idle = [
+                chat_id for chat_id, bucket in buckets.items()
+                if chat_id not in self._pending and bucket.full(now)
+            ]
+            for chat_id in idle:
+                del buckets[chat_id]
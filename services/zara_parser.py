@@ -1,29 +1,102 @@
 import logging
-import time
+from typing import Dict, List, Optional, Tuple
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException  # ⬅ додали
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    ElementClickInterceptedException,
+)
+
+from services import readiness
+from services.product_status import (
+    ProductStatus,
+    ERROR_OPEN_FAILED,
+    ERROR_NO_ADD_TO_CART,
+    ERROR_SIZES_NOT_FOUND,
+    ERROR_TIMEOUT,
+    SIZE_IN,
+    SIZE_LOW,
+    SIZE_OUT,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def accept_cookies(driver):
+COOKIES_BUTTON_ID = "onetrust-accept-btn-handler"
+GEO_BUTTON_XPATH = "//button[@data-qa-action='stay-in-store']"
+ADD_TO_CART_XPATH = (
+    "//div[contains(@class,'product-detail-cart-buttons__main-action')]"
+    "//button[@data-qa-action='add-to-cart']"
+)
+SIZE_BUTTONS_XPATH = "//ul[@class='size-selector-sizes']/li/button"
+
+COOKIES_BANNER = readiness.css("cookies", f"#{COOKIES_BUTTON_ID}")
+GEO_MODAL = readiness.xpath("geo", GEO_BUTTON_XPATH)
+
+ADD_TO_CART = readiness.xpath("add_to_cart", ADD_TO_CART_XPATH)
+SOLD_OUT = readiness.xpath(
+    "sold_out",
+    "//div[contains(@class,'product-detail-cart-buttons')]"
+    "//button[@data-qa-action='show-similar-products']",
+)
+ERROR_PAGE = readiness.css("error", ".error-page, .zds-empty-state")
+
+# Сторінка «готова», щойно зʼявилось хоч щось із цього
+ZARA_PRODUCT_READY = [ADD_TO_CART, SOLD_OUT, ERROR_PAGE]
+ZARA_PAGE_READY = ZARA_PRODUCT_READY + [COOKIES_BANNER, GEO_MODAL]
+
+# Назва + всі розміри з попапу за ОДИН execute_script (замість ~5 WebDriver-викликів на кнопку)
+EXTRACT_PRODUCT_JS = """
+const h1 = document.querySelector("h1[class*='product-detail-info__header-name']");
+const buttons = document.querySelectorAll("ul[class='size-selector-sizes'] > li > button");
+const sizes = [];
+buttons.forEach(btn => {
+    const labelEl = btn.querySelector("div[data-qa-qualifier='size-selector-sizes-size-label']");
+    if (!labelEl) return;
+    sizes.push({
+        label: (labelEl.innerText || labelEl.textContent || "").trim(),
+        action: (btn.getAttribute("data-qa-action") || "").toLowerCase(),
+    });
+});
+return {name: h1 ? (h1.innerText || h1.textContent || "").trim() : "", sizes: sizes};
+"""
+
+# data-qa-action розміру → стан розміру (все інше — SIZE_OUT)
+SIZE_ACTION_STATES = {
+    "size-in-stock": SIZE_IN,
+    "size-low-on-stock": SIZE_LOW,
+}
+
+# ключ у PooledDriver.state: банери вже закриті в цьому браузері (кукі згоди / магазину стоять)
+BANNERS_HANDLED = "zara_banners_handled"
+
+ZARA_SIZES_READY = [
+    readiness.xpath("sizes", SIZE_BUTTONS_XPATH),
+    readiness.css("sizes_empty", ".size-selector-sizes--empty, .size-selector__error"),
+]
+
+
+def accept_cookies(driver, report: Optional[readiness.ReadinessReport] = None):
     """
     Приймаємо кукі, якщо банер є.
+    Не чекаємо 5 сек «про всяк випадок» — банер або вже є, або його немає.
     """
-    try:
-        btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
-        )
-        btn.click()
-        time.sleep(1)
-    except Exception:
+    if readiness.first_present(driver, [COOKIES_BANNER]) is None:
         logger.info("⚠ Cookies banner not found")
+        if report:
+            report.skip(legacy=5, event="no_cookies")
+        return
+
+    try:
+        driver.find_element(By.ID, COOKIES_BUTTON_ID).click()
+        gone = readiness.js("cookies_gone", f"!document.getElementById('{COOKIES_BUTTON_ID}')")
+        if report:
+            report.wait(driver, [gone], timeout=1, legacy=1)
+    except Exception as e:
+        logger.info("⚠ Error while accepting cookies: %s", e)
 
 
-def handle_geolocation_modal(driver):
+def handle_geolocation_modal(driver, report: Optional[readiness.ReadinessReport] = None):
     """
     Закриваємо гео-модалку, якщо з'явилась:
     кнопка:
@@ -32,127 +105,190 @@ def handle_geolocation_modal(driver):
         Так, залишитися на сайті для Poland
     </button>
     """
+    if readiness.first_present(driver, [GEO_MODAL]) is None:
+        logger.info("ℹ Geolocation modal not shown")
+        if report:
+            report.skip(legacy=5, event="no_geo")
+        return
+
     try:
-        btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//button[@data-qa-action='stay-in-store']"
-            ))
-        )
-        btn.click()
+        driver.find_element(By.XPATH, GEO_BUTTON_XPATH).click()
         logger.info("✔ Geolocation modal accepted (stay in store)")
-        time.sleep(1)
-    except TimeoutException:
-        logger.info("ℹ Geolocation modal not shown")
+        gone = readiness.js(
+            "geo_gone",
+            "!document.querySelector(\"button[data-qa-action='stay-in-store']\")",
+        )
+        if report:
+            report.wait(driver, [gone], timeout=1, legacy=1)
     except Exception as e:
         logger.info("⚠ Error while handling geolocation modal: %s", e)
 
 
-def check_zara(driver, url: str) -> str:
+def check_zara(driver, url: str, driver_state: Optional[Dict] = None) -> ProductStatus:
     """
     Перевірка одного товару Zara.
     Використовує ВЖЕ СТВОРЕНИЙ driver (ми його не створюємо і не закриваємо тут).
 
-    Повертає текстовий статус (рядок), який потім йде в бот.
-    Формат розмірів спеціально зроблений під extract_available_sizes:
-    кожен доступний розмір має рядок виду "🟢 32", недоступний – "🔴 34".
+    Повертає ProductStatus (назва + стан кожного розміру),
+    в HTML для бота він рендериться тільки перед відправкою.
+
+    Замість фіксованих time.sleep чекаємо на «будь-яку з» умов
+    (кнопка кошика, «розпродано», помилка, банер) — див. services/readiness.py.
+
+    driver_state — PooledDriver.state: якщо банери вже закривали в цьому браузері,
+    на них більше не чекаємо.
     """
+    report = readiness.ReadinessReport(url)
 
     try:
-        driver.get(url)
+        opened = readiness.navigate(driver, url)
     except Exception as e:
         logger.warning("❗ Помилка відкриття сторінки %s: %s", url, e)
-        return (
-            f"<b>🧵 Zara</b>\n"
-            f"🔗 <a href=\"{url}\">Посилання на товар</a>\n"
-            f"⚠️ Помилка відкриття сторінки"
-        )
+        opened = False
+    if not opened:
+        return ProductStatus(brand="zara", error=ERROR_OPEN_FAILED)
 
-    # даємо React-у прогрузитися
-    time.sleep(5)
+    try:
+        return _parse_zara_page(driver, url, report, driver_state)
+    finally:
+        report.log()
 
-    # 1) кукі
-    accept_cookies(driver)
 
-    # 2) гео-модалка "Так, залишитися на сайті для Poland"
-    handle_geolocation_modal(driver)
+def _parse_zara_page(
+        driver,
+        url: str,
+        report: readiness.ReadinessReport,
+        driver_state: Optional[Dict] = None,
+) -> ProductStatus:
+    banners_handled = bool(driver_state and driver_state.get(BANNERS_HANDLED))
 
-    # 3) назва товару
-    product_name = ""
-    try:
-        name_el = WebDriverWait(driver, 7).until(
-            EC.presence_of_element_located((
-                By.XPATH,
-                "//h1[contains(@class,'product-detail-info__header-name')]"
-            ))
-        )
-        product_name = name_el.text.strip()
-    except Exception:
-        logger.info("ZARA product name not found")
+    # раніше тут був time.sleep(5) «даємо React-у прогрузитися»
+    state = report.wait(
+        driver, ZARA_PRODUCT_READY if banners_handled else ZARA_PAGE_READY, timeout=15, legacy=5,
+    )
+
+    if banners_handled:
+        # кукі згоди і магазину вже стоять — банерів не буде
+        report.skip(legacy=10, event="banners_handled")
+    else:
+        # 1) кукі
+        accept_cookies(driver, report)
+
+        # 2) гео-модалка "Так, залишитися на сайті для Poland"
+        handle_geolocation_modal(driver, report)
+
+    # 3) шукаємо кнопку "Додати у кошик" і клікаємо, щоб відкрився попап розмірів
+    if state in ("cookies", "geo"):
+        # сторінку «розбудив» банер — тепер чекаємо сам товар
+        state = report.wait(driver, ZARA_PRODUCT_READY, timeout=10, legacy=0)
 
-    # 4) шукаємо кнопку "Додати у кошик" і клікаємо, щоб відкрився попап розмірів
+    if state == "sold_out":
+        # «показати схожі» замість кошика — товар розпродано повністю:
+        # це результат перевірки (жодного розміру), а не збій
+        readiness.stop_loading(driver)
+        if driver_state is not None:
+            driver_state[BANNERS_HANDLED] = True
+        return ProductStatus(brand="zara", name=_read_name_xpath(driver))
+
+    if state is None or state == "error":
+        # товар так і не відрендерився / сторінка помилки (в т.ч. антибот) — це збій перевірки,
+        # а не «немає кошика»: відомий стан товару такий результат не затирає
+        if driver_state is not None:
+            driver_state.pop(BANNERS_HANDLED, None)
+        return ProductStatus(brand="zara", error=ERROR_TIMEOUT if state is None else ERROR_OPEN_FAILED)
+
+    add_btns = driver.find_elements(By.XPATH, ADD_TO_CART_XPATH) if state == "add_to_cart" else []
     try:
-        add_btn = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//div[contains(@class,'product-detail-cart-buttons__main-action')]"
-                "//button[@data-qa-action='add-to-cart']"
-            ))
-        )
-        add_btn.click()
-        time.sleep(1)
+        if not add_btns:
+            raise NoSuchElementException(f"page state: {state}")
+        try:
+            add_btns[0].click()
+        except ElementClickInterceptedException:
+            # банер міг зʼявитись уже після готовності сторінки (або кукі згоди протухли)
+            accept_cookies(driver)
+            handle_geolocation_modal(driver)
+            add_btns[0].click()
     except Exception as e:
-        header_lines = ["<b>🧵 Zara</b>"]
-        if product_name:
-            header_lines.append(product_name)
-        header_lines.append(f"🔗 <a href=\"{url}\">Посилання на товар</a>")
-        header_lines.append("❌ Кнопку 'Додати у кошик' не знайдено — товар/розміри можуть бути недоступні.")
-        return "\n".join(header_lines)
+        if driver_state is not None:
+            driver_state.pop(BANNERS_HANDLED, None)
+        return ProductStatus(brand="zara", name=_read_name_xpath(driver), error=ERROR_NO_ADD_TO_CART)
 
-    # 5) парсимо розміри з попапу
-    lines: list[str] = ["<b>🧵 Zara</b>"]
+    if driver_state is not None:
+        # дійшли до товару і клік не перекрило — у цьому браузері банери більше не заважають
+        driver_state[BANNERS_HANDLED] = True
 
-    # бренд + назва
-    if product_name:
-        lines.append(product_name)
+    # 4) назва + розміри з попапу
+    sizes: Optional[List[Tuple[str, int]]] = None
+    # раніше тут був time.sleep(1) після кліку
+    sizes_state = report.wait(driver, ZARA_SIZES_READY, timeout=10, legacy=1)
+    sizes_ready = sizes_state == "sizes"
+    if sizes_state is not None:
+        # попап розмірів уже в DOM — решта сторінки нам не потрібна
+        readiness.stop_loading(driver)
 
-    # посилання
-    lines.append(f"🔗 <a href=\"{url}\">{product_name}</a>")
+    product_name = ""
+    if sizes_ready:
+        extracted = _extract_product_js(driver)
+        if extracted is not None:
+            product_name, sizes = extracted
 
-    # розміри
-    lines.append("📏 Розміри:")
+    if sizes is None:
+        # fallback: старий XPath-парсинг по кнопках
+        product_name = _read_name_xpath(driver)
+        if sizes_ready:
+            sizes = _parse_sizes_xpath(driver)
 
-    try:
-        size_buttons = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((
-                By.XPATH,
-                "//ul[@class='size-selector-sizes']/li/button"
-            ))
-        )
+    if sizes is None:
+        return ProductStatus(brand="zara", name=product_name, error=ERROR_SIZES_NOT_FOUND)
+    return ProductStatus(brand="zara", name=product_name, sizes=tuple(sizes))
 
-        for btn in size_buttons:
-            try:
-                label_el = btn.find_element(
-                    By.XPATH,
-                    ".//div[@data-qa-qualifier='size-selector-sizes-size-label']"
-                )
-                label = label_el.text.strip()
-            except Exception:
-                continue
-
-            action = (btn.get_attribute("data-qa-action") or "").lower()
-            # data-qa-action: size-in-stock / size-out-of-stock
-            if action == "size-in-stock":
-                mark = "🟢"
-            elif action == "size-low-on-stock":
-                mark = "🟡"
-            else:
-                mark = "🔴"
-
-            # формат важливий для extract_available_sizes
-            lines.append(f"{mark} {label}")
 
+def _extract_product_js(driver) -> Optional[Tuple[str, List[Tuple[str, int]]]]:
+    """
+    (назва, [(розмір, стан), ...]) одним викликом execute_script.
+    None — якщо JS не спрацював або розмірів не знайшов (тоді йдемо в XPath).
+    """
+    try:
+        data = driver.execute_script(EXTRACT_PRODUCT_JS)
     except Exception as e:
-        lines.append("❗ Розміри не знайдені")
+        logger.info("ZARA JS extraction failed: %s", e)
+        return None
+
+    if not data or not data.get("sizes"):
+        return None
+
+    sizes = [
+        (item["label"], SIZE_ACTION_STATES.get(item.get("action") or "", SIZE_OUT))
+        for item in data["sizes"]
+        if item.get("label")
+    ]
+    return (data.get("name") or "").strip(), sizes
+
+
+def _read_name_xpath(driver) -> str:
+    name_els = driver.find_elements(
+        By.XPATH,
+        "//h1[contains(@class,'product-detail-info__header-name')]"
+    )
+    if not name_els:
+        logger.info("ZARA product name not found")
+        return ""
+    return name_els[0].text.strip()
+
+
+def _parse_sizes_xpath(driver) -> List[Tuple[str, int]]:
+    sizes: List[Tuple[str, int]] = []
+    for btn in driver.find_elements(By.XPATH, SIZE_BUTTONS_XPATH):
+        try:
+            label_el = btn.find_element(
+                By.XPATH,
+                ".//div[@data-qa-qualifier='size-selector-sizes-size-label']"
+            )
+            label = label_el.text.strip()
+        except Exception:
+            continue
 
-    return "\n".join(lines)
+        # data-qa-action: size-in-stock / size-low-on-stock / size-out-of-stock
+        action = (btn.get_attribute("data-qa-action") or "").lower()
+        sizes.append((label, SIZE_ACTION_STATES.get(action, SIZE_OUT)))
+    return sizes
@@ -0,0 +1,24 @@
+from config import MONITOR_MAX_INTERVAL, MONITOR_MIN_INTERVAL
+from services.scheduler import next_interval
+
+
+def test_next_interval_stays_within_bounds():
+    cases = [
+        # (попередній інтервал, changed, low_stock, failed)
+        (None, True, False, False),
+        (MONITOR_MIN_INTERVAL, False, True, False),
+        (MONITOR_MAX_INTERVAL, False, False, False),
+        (MONITOR_MAX_INTERVAL * 10, False, False, True),
+        (1, False, False, True),
+    ]
+    for prev, changed, low_stock, failed in cases:
+        for _ in range(2000):
+            interval = next_interval(prev, 30, changed=changed, low_stock=low_stock, failed=failed)
+            assert MONITOR_MIN_INTERVAL <= interval <= MONITOR_MAX_INTERVAL
+
+
+def test_stable_result_backs_off_to_the_ceiling():
+    interval = None
+    for _ in range(100):
+        interval = next_interval(interval, 30, changed=False, low_stock=False)
+    assert interval > MONITOR_MAX_INTERVAL * 0.8
@@ -0,0 +1,35 @@
+from services.product_status import SIZE_IN, SIZE_LOW, SIZE_OUT, ProductStatus, normalize_size, status_from_db
+from services.size_catalog import SizeCatalog
+
+
+def test_normalize_size_takes_first_token():
+    assert normalize_size("m (EU 38)") == "M"
+    assert normalize_size("  34 EU ") == "34"
+    assert normalize_size("") == ""
+
+
+def test_legacy_row_and_fresh_result_agree_on_multi_word_labels():
+    fresh = ProductStatus(
+        brand="zara",
+        name="СОРОЧКА",
+        sizes=(("S (EU 36)", SIZE_OUT), ("M (EU 38)", SIZE_IN), ("L (EU 40)", SIZE_LOW)),
+    )
+    # так цей самий стан лежав у старих рядках БД (last_status — HTML-текст)
+    legacy_text = "\n".join([
+        "<b>🧵 Zara</b>",
+        "📏 Розміри:",
+        "🔴 S (EU 36)",
+        "🟢 M (EU 38)",
+        "🟡 L (EU 40)",
+    ])
+    legacy = status_from_db(None, legacy_text, "zara")
+
+    assert legacy.available_sizes == fresh.available_sizes == {"M", "L"}
+    assert legacy.fingerprint == fresh.fingerprint
+
+    catalog = SizeCatalog()
+    key = "https://www.zara.com/ua/p1.html"
+    assert catalog.mask(key, legacy.available_sizes) == catalog.mask(key, fresh.available_sizes)
+    # фільтр sizes, збережений до оновлення, і далі збігається з наявністю
+    wanted = catalog.parse_filter(key, "m,XL")
+    assert catalog.mask(key, fresh.available_sizes) & wanted == catalog.mask(key, {"M"})
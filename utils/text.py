@@ -0,0 +1,25 @@
+from typing import Iterable, List
+
+# Ліміт Telegram — 4096 символів, 3500 беремо з запасом (HTML-теги, емодзі)
+MESSAGE_CHUNK_LIMIT = 3500
+
+
+def chunk_lines(lines: Iterable[str], first: str = "", limit: int = MESSAGE_CHUNK_LIMIT) -> List[str]:
+    """
+    Склеює рядки в повідомлення, не довші за limit.
+    first — з чого починається перше повідомлення (напр. заголовок).
+    Рядок не розрізається: якщо не влазить — іде в наступне повідомлення.
+    """
+    chunks: List[str] = []
+    current = first
+
+    for line in lines:
+        if len(current) + len(line) + 1 > limit:
+            if current.strip():
+                chunks.append(current)
+            current = ""
+        current += line + "\n"
+
+    if current.strip():
+        chunks.append(current)
+    return chunks
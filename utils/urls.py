@@ -1,6 +1,6 @@
 import re
 from typing import List
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 import re
 from typing import Set
 
@@ -37,6 +37,34 @@ def detect_brand(url: str) -> str | None:
     return None
 
 
+TRACKING_PARAMS_PREFIXES = ("utm_", "gclid", "fbclid", "_ga")
+
+
+def product_key(url: str) -> str:
+    """
+    Нормалізований URL товару — ключ для дедуплікації в моніторингу.
+    Прибираємо #фрагмент і трекінгові параметри (utm_*, gclid, ...),
+    решту query (v1=..., colorId=...) залишаємо — вони визначають варіант товару.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+    except Exception:
+        return url
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS_PREFIXES)
+    ]
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(query),
+        "",
+    ))
+
+
 def extract_available_sizes(status_text: str) -> Set[str]:
     """
     З тексту статусу дістаємо множину розмірів, які зараз в наявності.